@@ -0,0 +1,115 @@
+import numpy as np
+
+from lap_charts import invert
+from lap_store import STORE_PATH, build_store, open_store
+from validate import EMPTY
+
+# Columns of the table returned by race_metrics
+COLUMNS = (
+    "year",
+    "race",
+    "car",
+    "grid",
+    "finish",
+    "positions_gained",
+    "laps_completed",
+    "laps_led",
+    "position_changes",
+    "best_lap_gain",
+    "worst_lap_loss",
+)
+
+
+def position_matrix(cars):
+    """
+    Invert the car number matrix of a store, see lap_charts.invert.
+
+    Args:
+        cars (ndarray): Car numbers, one row per GRID / LAP row, EMPTY where
+            no car is listed
+
+    Returns:
+        ndarray: int16 matrix where [row, car] is the 1-based position of
+            the car in that row, EMPTY where it is not listed
+    """
+    # invert gives [car, row]; the metrics work along the rows
+    return invert(cars).T.astype(np.int16)
+
+
+def race_metrics(store=None):
+    """
+    Compute the position metrics of every driver in every race of a store.
+
+    All races are handled at once: the store's car matrix is inverted into
+    a row × car position matrix, lap to lap moves are a diff along the rows
+    and the per-race totals are reductions over each race's row range.
+
+    A position change is any lap on which a car's position differs from the
+    lap before, including moves made in the pits. Cars that retire finish
+    in the position they last held; cars missing from the GRID have no grid
+    position and no positions gained.
+
+    Args:
+        store (LapStore): Store to read, by default the lap chart store,
+            built from the CSV archive if there is none yet
+
+    Returns:
+        DataFrame: One row per driver and race, see COLUMNS
+    """
+    import pandas as pd
+
+    if store is None:
+        store = open_store(STORE_PATH) or build_store()
+
+    counts = np.diff(store.offsets)
+    races = np.flatnonzero(counts)
+    starts = store.offsets[:-1][races]
+    if not len(races):
+        return pd.DataFrame(columns=COLUMNS)
+
+    positions = position_matrix(np.asarray(store.cars))
+    listed = positions != EMPTY
+    racing = listed & (np.asarray(store.laps) > 0)[:, None]
+
+    # moves[r] is the move from row r - 1 to row r, zero on each race's GRID
+    moves = np.zeros(positions.shape, np.int16)
+    moves[1:] = positions[:-1] - positions[1:]
+    moves[1:][~(listed[1:] & listed[:-1])] = 0
+    moves[starts] = 0
+
+    row_index = np.arange(positions.shape[0])[:, None]
+    last_row = np.maximum.reduceat(np.where(listed, row_index, -1), starts)
+    seen = last_row >= 0
+    finish = np.take_along_axis(positions, np.maximum(last_row, 0), axis=0)
+    grid = positions[starts]
+
+    metrics = {
+        "grid": grid,
+        "finish": finish,
+        "positions_gained": np.where(grid != EMPTY, grid - finish, 0),
+        "laps_completed": np.add.reduceat(racing, starts),
+        "laps_led": np.add.reduceat(racing & (positions == 1), starts),
+        "position_changes": np.add.reduceat(moves != 0, starts),
+        "best_lap_gain": np.maximum.reduceat(moves, starts),
+        "worst_lap_loss": -np.minimum.reduceat(moves, starts),
+    }
+
+    race_index, car = np.nonzero(seen)
+    table = {
+        "year": np.array([store.races[i]["year"] for i in races])[race_index],
+        "race": np.array([store.races[i]["race"] for i in races])[race_index],
+        "car": car,
+    }
+    off_grid = grid[race_index, car] == EMPTY
+    for name, values in metrics.items():
+        table[name] = values[race_index, car]
+    for name in ("grid", "positions_gained"):
+        table[name] = pd.array(table[name], "Int16")
+        table[name][off_grid] = pd.NA
+    frame = pd.DataFrame(table, columns=COLUMNS)
+    # Classification order: most laps completed first, then final position
+    return frame.sort_values(
+        ["year", "race", "laps_completed", "finish"],
+        ascending=[True, True, False, True],
+        ignore_index=True,
+    )
@@ -0,0 +1,179 @@
+import csv
+import io
+import os
+
+import seasons
+
+ARCHIVE_DIR = "."
+
+# Fewer lap rows than this means the model output was cut short
+MIN_LAPS = 5
+
+
+def race_slug(race_name):
+    """Format an event name the way archive file names use it."""
+    return race_name.replace(" ", "_").lower()
+
+
+def csv_path(year, race_name, archive_dir=ARCHIVE_DIR):
+    """Return the archive path of a race's lap chart CSV."""
+    return os.path.join(archive_dir, f"{year}_{race_slug(race_name)}.csv")
+
+
+def check_rows(rows):
+    """
+    Check the structure of a lap chart given as parsed CSV rows.
+
+    Rows may omit or add trailing empty cells, but every car number has to
+    fall under a POS column, the GRID row must come first and lap labels must
+    run LAP 1, LAP 2, ... without gaps.
+
+    Args:
+        rows (list): CSV rows, each a list of cell strings
+
+    Returns:
+        list: Descriptions of the problems found, empty if the table is valid
+    """
+    rows = [row for row in rows if row]
+    if not rows:
+        return ["empty file"]
+
+    problems = []
+    header = rows[0]
+    positions = len(header) - 1
+    if header[0] != "POS" or header[1:] != [str(i) for i in range(1, positions + 1)]:
+        problems.append("bad header")
+    if len(rows) < 2 or rows[1][0] != "GRID":
+        problems.append("missing GRID row")
+
+    laps = rows[2:]
+    if len(laps) < MIN_LAPS:
+        problems.append(f"only {len(laps)} lap rows")
+
+    for lap, row in enumerate(laps, start=1):
+        if row[0] != f"LAP {lap}":
+            problems.append(f"expected LAP {lap}, found {row[0]!r}")
+            break
+
+    for row in rows[1:]:
+        cells = row[1:]
+        if any(cells[positions:]):
+            problems.append(f"{row[0]}: more cars than positions")
+        if not all(cell.isdigit() for cell in cells if cell):
+            problems.append(f"{row[0]}: non-numeric car number")
+
+    return problems
+
+
+class RowChecker:
+    """
+    Validate lap chart rows one at a time, as they are produced.
+
+    Used while a model response is still streaming, so a table that goes off
+    the rails can be abandoned at the first bad row instead of at the end.
+
+    Args:
+        page (bool): The table is one page of a longer chart, so the rows
+            after the header may start at any LAP n instead of the GRID
+    """
+
+    def __init__(self, page=False):
+        self.page = page
+        self.positions = None
+        self.expected = "POS"
+
+    def check(self, row):
+        """
+        Check the next row of the table.
+
+        Args:
+            row (list): CSV cells of the row
+
+        Returns:
+            str: Description of the problem, None if the row is fine
+        """
+        label = row[0] if row else ""
+        if self.expected is None:
+            # First row of a page: the GRID or whichever lap the page starts with
+            if label != "GRID" and not (label.startswith("LAP ") and label[4:].isdigit()):
+                return f"expected GRID or LAP n, found {label!r}"
+        elif label != self.expected:
+            return f"expected {self.expected}, found {label!r}"
+
+        cells = row[1:]
+        if self.positions is None:
+            self.positions = len(cells)
+            if cells != [str(i) for i in range(1, self.positions + 1)]:
+                return "bad header"
+            self.expected = None if self.page else "GRID"
+            return None
+
+        if any(cells[self.positions :]):
+            return f"{label}: more cars than positions"
+        if not all(cell.isdigit() for cell in cells if cell):
+            return f"{label}: non-numeric car number"
+
+        lap = 1 if label == "GRID" else int(label[4:]) + 1
+        self.expected = f"LAP {lap}"
+        return None
+
+
+def check_csv_text(csv_content):
+    """Check the structure of a lap chart given as CSV text, see check_rows."""
+    try:
+        return check_rows(list(csv.reader(io.StringIO(csv_content))))
+    except csv.Error as e:
+        return [f"unparsable: {e}"]
+
+
+def check_csv(path):
+    """
+    Check the structure of a lap chart CSV file, see check_rows.
+
+    Args:
+        path (str): Path to the CSV file
+
+    Returns:
+        list: Descriptions of the problems found, empty if the file is valid
+    """
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.reader(f))
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        return [f"unreadable: {e}"]
+    return check_rows(rows)
+
+
+def build_work_plan(years, archive_dir=ARCHIVE_DIR):
+    """
+    Compare the calendar with the CSV archive.
+
+    Args:
+        years (list): Seasons to check
+        archive_dir (str): Directory holding the lap chart CSVs
+
+    Returns:
+        list: (year, race_id, race_name, reason) for every race that is
+            missing from the archive or fails the structural check
+    """
+    plan = []
+    for year in years:
+        for race_id, race_name in enumerate(seasons.get_events(year), start=1):
+            path = csv_path(year, race_name, archive_dir)
+            if not os.path.exists(path):
+                plan.append((year, race_id, race_name, "missing"))
+                continue
+            problems = check_csv(path)
+            if problems:
+                plan.append((year, race_id, race_name, "; ".join(problems)))
+    return plan
+
+
+def print_plan(plan):
+    """Print a work plan built by build_work_plan."""
+    if not plan:
+        print("Archive is up to date, nothing to process.")
+        return
+    print(f"{len(plan)} races to process:")
+    for year, race_id, race_name, reason in plan:
+        print(f"  {year} #{race_id} {race_name}: {reason}")
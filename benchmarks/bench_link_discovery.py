@@ -0,0 +1,105 @@
+"""
+Compare link discovery on FIA event timing pages.
+
+Times the original three-scan BeautifulSoup lookup against the single-pass
+index from links.py. Pass saved event pages as arguments, or run without
+arguments to use a generated page listing several hundred documents.
+
+    python benchmarks/bench_link_discovery.py [page.html ...]
+"""
+
+import os
+import re
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from links import find_document_link, index_pdf_links  # noqa: E402
+
+
+def soup_lookup(html_content):
+    """The lookup download_lap_chart_pdf used before the single-pass index."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    links = soup.find_all("a", href=re.compile(r"\.pdf$"))
+    for link in links:
+        if link.text and "Lap Chart" in link.text:
+            return link["href"]
+    for text in soup.find_all(string=lambda text: text and "Lap Chart" in text):
+        pdf_link = text.parent.find("a", href=re.compile(r"\.pdf$"))
+        if pdf_link:
+            return pdf_link["href"]
+    for div in soup.find_all("div", class_="title"):
+        if div.text and "Lap Chart" in div.text:
+            pdf_link = div.parent.find("a", href=re.compile(r"\.pdf$"))
+            if pdf_link:
+                return pdf_link["href"]
+    return None
+
+
+def single_pass_lookup(html_content):
+    return find_document_link(index_pdf_links(html_content), "Lap Chart")
+
+
+def sample_page(documents=400):
+    """Build an event timing page shaped like the FIA document listings."""
+    names = [
+        "Race Classification",
+        "Race Fastest Laps",
+        "Race Pit Stop Summary",
+        "Race Speed Trap",
+        "Race History Chart",
+        "Race Best Sector Times",
+    ]
+    rows = []
+    for i in range(documents):
+        name = names[i % len(names)]
+        rows.append(
+            '<li class="document-row">'
+            f'<a href="/sites/default/files/doc_{i}.pdf">'
+            f'<div class="title">2024 Grand Prix - {name} {i}</div>'
+            '<div class="published">Published on 26.05.24 16:01 CET</div>'
+            "</a></li>"
+        )
+    rows.append(
+        '<li class="document-row">'
+        '<a href="/sites/default/files/lap_chart.pdf">'
+        '<div class="title">2024 Grand Prix - Race Lap Chart</div>'
+        "</a></li>"
+    )
+    return (
+        "<html><head><title>Event timing</title></head><body>"
+        '<div class="content"><ul class="event-documents">'
+        + "".join(rows)
+        + "</ul></div></body></html>"
+    )
+
+
+def main(paths):
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                pages.append((os.path.basename(path), f.read()))
+    else:
+        pages = [("generated (400 documents)", sample_page())]
+
+    for name, html_content in pages:
+        expected = soup_lookup(html_content)
+        found = single_pass_lookup(html_content)
+        if found != expected:
+            print(f"{name}: MISMATCH soup={expected!r} single-pass={found!r}")
+
+        runs = 20
+        soup_time = timeit.timeit(lambda: soup_lookup(html_content), number=runs) / runs
+        single_time = timeit.timeit(lambda: single_pass_lookup(html_content), number=runs) / runs
+        print(
+            f"{name}: soup {soup_time * 1000:.2f} ms, single pass "
+            f"{single_time * 1000:.2f} ms, speedup {soup_time / single_time:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
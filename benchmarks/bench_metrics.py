@@ -0,0 +1,98 @@
+"""
+Compare position metrics computed per row against the vectorized engine.
+
+Times a per-driver, per-lap Python loop over the CSV archive against
+analytics.race_metrics over the lap chart store, and checks that both agree.
+Pass a number of copies to tile the archive and see how the engine scales.
+
+    python benchmarks/bench_metrics.py [copies]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from analytics import race_metrics  # noqa: E402
+from lap_store import LapStore, _write_store, archive_files, build_store  # noqa: E402
+from validate import EMPTY, read_chart  # noqa: E402
+
+
+def loop_metrics(csv_files):
+    """Per-row metrics the way a notebook would compute them."""
+    table = {}
+    for year, race, path in csv_files:
+        cars, _, _ = read_chart(path)
+        previous = {}
+        for lap, row in enumerate(cars.tolist()):
+            current = {car: position + 1 for position, car in enumerate(row) if car != EMPTY}
+            for car, position in current.items():
+                entry = table.setdefault(
+                    (year, race, car),
+                    {"laps_led": 0, "position_changes": 0, "best_lap_gain": 0, "worst_lap_loss": 0},
+                )
+                entry["finish"] = position
+                if lap and position == 1:
+                    entry["laps_led"] += 1
+                if car in previous and previous[car] != position:
+                    move = previous[car] - position
+                    entry["position_changes"] += 1
+                    entry["best_lap_gain"] = max(entry["best_lap_gain"], move)
+                    entry["worst_lap_loss"] = max(entry["worst_lap_loss"], -move)
+            previous = current
+    return table
+
+
+def tiled_store(store, copies, path):
+    """Write a store holding `copies` repetitions of every race."""
+    races, laps, cars = [], [], []
+    for copy in range(copies):
+        for i, race in enumerate(store.races):
+            start, end = store.offsets[i], store.offsets[i + 1]
+            races.append(dict(race, year=race["year"] + 100 * copy))
+            laps.append(store.laps[start:end])
+            cars.append(store.chart(race["year"], race["race"]))
+    _write_store(path, races, laps, cars, store.positions)
+    return LapStore(path)
+
+
+def main(copies):
+    csv_files = archive_files()
+    store = build_store()
+
+    start = time.perf_counter()
+    expected = loop_metrics(csv_files)
+    loop_time = time.perf_counter() - start
+
+    race_metrics(store)
+    start = time.perf_counter()
+    frame = race_metrics(store)
+    engine_time = time.perf_counter() - start
+
+    mismatches = 0
+    for row in frame.itertuples():
+        entry = expected.get((row.year, row.race, row.car))
+        if entry is None or any(getattr(row, name) != value for name, value in entry.items()):
+            mismatches += 1
+    if mismatches or len(frame) != len(expected):
+        print(f"MISMATCH in {mismatches} of {len(frame)} rows ({len(expected)} expected)")
+
+    print(
+        f"{len(store)} races, {len(frame)} drivers: loop {loop_time * 1000:.1f} ms, "
+        f"vectorized {engine_time * 1000:.1f} ms, speedup {loop_time / engine_time:.1f}x"
+    )
+
+    if copies > 1:
+        with tempfile.TemporaryDirectory() as tmp:
+            tiled = tiled_store(store, copies, os.path.join(tmp, "tiled.bin"))
+            start = time.perf_counter()
+            race_metrics(tiled)
+            tiled_time = time.perf_counter() - start
+            print(f"{len(tiled)} races: vectorized {tiled_time * 1000:.1f} ms")
+            del tiled
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,258 @@
+"""
+Measure extraction throughput offline.
+
+Runs process_race_data (serial) or run_extraction (the concurrent pipeline)
+over synthetic races served by a local FIA stand-in, with a fake Gemini
+client answering from the CSV archive. Reports races per minute, p50 / p95
+latency of every stage and peak RSS, and writes them as JSON so runs can be
+compared.
+
+    python benchmarks/bench_pipeline.py --races 20 --mode pipeline --model-latency 2 \
+        --rate-429 0.1 --output results.json
+
+Pass --fast-model NAME to put a faster, less reliable model in front of
+the main one (see engines.TieredEngine); --fast-garble sets how often its
+tables come back broken and need the main model.
+
+Pass --rasterize pages|composite to upload cropped table images instead of
+the PDFs; compare the upload bytes and file_upload / rasterize times with a
+run without it. csv_sha256 covers every generated CSV, so identical output
+shows as an identical digest.
+
+Pass --recordings DIR to replay saved fia.com pages and PDFs instead of the
+synthetic races; see offline.load_recordings for the layout.
+"""
+
+import argparse
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import offline  # noqa: E402
+
+STAGES = {
+    # Functions timed in each mode, by the name reported for them
+    "serial": {
+        "fetch": "find_race_pdf_link",
+        "download": "download_pdf",
+        "generate": "generate_csv_from_pdf",
+        "race": "process_race_data",
+    },
+    "pipeline": {
+        "fetch": "fetch_stage",
+        "download": "download_stage",
+        "generate": "generate_stage",
+    },
+}
+
+
+class StageTimer:
+    """Collects the wall time of every call of wrapped functions."""
+
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def wrap(self, name, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.samples.setdefault(name, []).append(elapsed)
+
+        return timed
+
+    def summary(self):
+        return {
+            name: {
+                "count": len(samples),
+                "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 1),
+                "p95_ms": round(float(np.percentile(samples, 95)) * 1000, 1),
+                "total_s": round(sum(samples), 3),
+            }
+            for name, samples in self.samples.items()
+        }
+
+
+def synthetic_registry(events, year):
+    """A season registry whose only season is the benchmark's races."""
+    import seasons
+
+    data, _ = seasons.read_registry_data()
+    data["seasons"] = {
+        str(year): {"events": events, "sessions": {"default": "normal"}, "teams": {}}
+    }
+    return seasons.SeasonRegistry(data)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline extraction pipeline benchmark.")
+    parser.add_argument("--races", type=int, default=20)
+    parser.add_argument("--mode", choices=sorted(STAGES), default="pipeline")
+    parser.add_argument("--recordings", help="directory of recorded fia.com pages and PDFs")
+    parser.add_argument("--year", type=int, help="season of the recorded races")
+    parser.add_argument("--model-latency", type=float, default=1.0)
+    parser.add_argument("--upload-latency", type=float, default=0.05)
+    parser.add_argument("--upload-bandwidth", type=float, help="upload bytes per second")
+    parser.add_argument("--fia-latency", type=float, default=0.05)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--fast-model", help="try this model before the main one")
+    parser.add_argument("--fast-latency", type=float, default=0.25)
+    parser.add_argument("--fast-garble", type=float, default=0.2)
+    parser.add_argument("--rpm", type=int, default=1000)
+    parser.add_argument("--rpd", type=int, default=100000)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--rasterize", choices=("pages", "composite"))
+    parser.add_argument("--raster-dpi", type=int, default=150)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    from lap_store import archive_files
+
+    csv_files = archive_files(ROOT)
+    fallback = []
+    for _, _, path in csv_files:
+        with open(path, encoding="utf-8") as f:
+            fallback.append(f.read().strip())
+
+    if args.recordings:
+        resources = offline.load_recordings(args.recordings)
+        answers = {}
+        year = args.year
+        events = None
+    else:
+        year = offline.SYNTHETIC_YEAR
+        events, resources, answers = offline.synthetic_races(csv_files, args.races, year)
+
+    output = os.path.abspath(args.output) if args.output else None
+    work_dir = tempfile.TemporaryDirectory()
+    # Caches, the PDF store and the generated CSVs all use relative paths
+    os.chdir(work_dir.name)
+
+    import engines
+    import extract
+    import resolver
+    import scheduler
+    import seasons
+    import telemetry
+
+    client = offline.FakeClient(
+        answers,
+        fallback,
+        latency=args.model_latency,
+        upload_latency=args.upload_latency,
+        rate_429=args.rate_429,
+        seed=args.seed,
+        model_latency={args.fast_model: args.fast_latency} if args.fast_model else None,
+        garble={args.fast_model: args.fast_garble} if args.fast_model else None,
+        upload_bandwidth=args.upload_bandwidth,
+    )
+    if args.rasterize:
+        offline.raster_answers(resources, client, args.rasterize, args.raster_dpi)
+    offline.install_fake_client(client)
+    # Retries back off on the same scale as the fake model's latency
+    extract.QuotaScheduler = functools.partial(
+        scheduler.QuotaScheduler,
+        base_delay=args.model_latency,
+        max_delay=30 * args.model_latency,
+    )
+
+    timer = StageTimer()
+    for name, function in STAGES[args.mode].items():
+        setattr(extract, function, timer.wrap(name, getattr(extract, function)))
+
+    with offline.ReplayServer(resources, args.fia_latency) as server:
+        resolver.FIA_BASE_URL = server.url
+        if events is not None:
+            registry = synthetic_registry(events, year)
+            seasons.get_registry = lambda path=None: registry
+        races = len(seasons.get_events(year))
+
+        log = io.StringIO()
+        redirect = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(log)
+        start = time.perf_counter()
+        with redirect:
+            if args.mode == "serial":
+                engine = extract.get_engine(
+                    "gemini",
+                    stream=args.stream,
+                    fast_model=args.fast_model,
+                    raster=args.rasterize,
+                    dpi=args.raster_dpi,
+                )
+                csv_files_written = [
+                    extract.process_race_data(year, race_id, engine)
+                    for race_id in range(1, races + 1)
+                ]
+                csv_files_written = [path for path in csv_files_written if path]
+            else:
+                csv_files_written = extract.run_extraction(
+                    [year],
+                    rpm=args.rpm,
+                    rpd=args.rpd,
+                    stream=args.stream,
+                    batch_size=args.batch_size,
+                    fast_model=args.fast_model,
+                    fast_rpm=args.rpm,
+                    fast_rpd=args.rpd,
+                    raster=args.rasterize,
+                    raster_dpi=args.raster_dpi,
+                )
+        elapsed = time.perf_counter() - start
+
+    digest = hashlib.sha256()
+    for path in sorted(csv_files_written):
+        with open(path, "rb") as f:
+            digest.update(path.encode("utf-8") + b"\0" + f.read())
+
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key != "verbose"},
+        "races": races,
+        "completed": len(csv_files_written),
+        "elapsed_s": round(elapsed, 3),
+        "races_per_minute": round(len(csv_files_written) / elapsed * 60, 2) if elapsed else 0,
+        "stages": timer.summary(),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "fia": {"requests": server.requests, "bytes_sent": server.bytes_sent},
+        "model": client.stats,
+        "csv_sha256": digest.hexdigest(),
+        "tiers": engines.tier_report(telemetry.get_telemetry().totals),
+        "telemetry": telemetry.get_telemetry().totals,
+    }
+    os.chdir(ROOT)
+    work_dir.cleanup()
+
+    print(json.dumps(results, indent=2))
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
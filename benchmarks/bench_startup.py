@@ -0,0 +1,93 @@
+"""
+Measure the cold-start import cost of the extraction entry point.
+
+Imports a module in fresh interpreters under `python -X importtime` and
+reports the median total time, the slowest imports and whether matplotlib
+was loaded. With --ref, the same is measured on a git revision of the tree
+for a before / after comparison.
+
+    python benchmarks/bench_startup.py [--module extract] [--ref HEAD~1] [--runs 7]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+HEAVY = ("matplotlib", "wget", "pandas", "google.genai", "pymupdf")
+
+
+def import_times(module, cwd):
+    """
+    Import a module once in a fresh interpreter.
+
+    Returns:
+        tuple: (total microseconds, {module: cumulative microseconds})
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times[module], times
+
+
+def measure(module, cwd, runs):
+    totals = []
+    for _ in range(runs):
+        total, times = import_times(module, cwd)
+        totals.append(total)
+    return statistics.median(totals), times
+
+
+def report(label, module, cwd, runs, top):
+    total, times = measure(module, cwd, runs)
+    loaded = [name for name in HEAVY if name in times]
+    print(f"{label}: import {module} {total / 1000:.1f} ms (median of {runs})")
+    print(f"  heavy modules loaded: {', '.join(loaded) or 'none'}")
+    top_level = {name: t for name, t in times.items() if name != module and "." not in name}
+    for name, t in sorted(top_level.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {t / 1000:8.1f} ms  {name}")
+    return total
+
+
+def export_revision(ref, directory):
+    """Write the tree of a git revision into a directory."""
+    archive = os.path.join(directory, "tree.tar")
+    with open(archive, "wb") as f:
+        subprocess.run(["git", "archive", ref], cwd=ROOT, stdout=f, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(directory, filter="data")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="extract")
+    parser.add_argument("--ref", help="git revision to compare against")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    after = report("working tree", args.module, ROOT, args.runs, args.top)
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            export_revision(args.ref, tmp)
+            before = report(args.ref, args.module, tmp, args.runs, args.top)
+        print(f"speedup {before / after:.2f}x ({(before - after) / 1000:.1f} ms saved)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+Local stand-ins for fia.com and the Gemini API.
+
+ReplayServer serves FIA event timing pages and lap chart PDFs from memory,
+either recorded copies or synthetic races built from the CSV archive.
+FakeClient mimics the parts of `genai.Client` the extraction engines use and
+answers with archived CSVs, after a configurable latency and with injected
+429 errors. Used by the pipeline benchmarks; nothing here talks to the
+network.
+"""
+
+import hashlib
+import mimetypes
+import os
+import random
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from resolver import VARIANTS, event_page_url  # noqa: E402
+
+SYNTHETIC_YEAR = 2099
+
+
+class Resource:
+    """A response body served by ReplayServer, with its validators."""
+
+    def __init__(self, content, content_type):
+        self.content = content
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(content).hexdigest()[:16] + '"'
+        self.last_modified = formatdate(usegmt=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ReplayServer/1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _resource(self):
+        time.sleep(self.server.latency)
+        self.server.count(self.command)
+        return self.server.resources.get(self.path.split("?")[0])
+
+    def _headers(self, resource, status, length, extra=()):
+        self.send_response(status)
+        self.send_header("Content-Type", resource.content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", resource.etag)
+        self.send_header("Last-Modified", resource.last_modified)
+        self.send_header("Accept-Ranges", "bytes")
+        for name, value in extra:
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        resource = self._resource()
+        if resource is None:
+            self.send_error(404)
+            return
+        self._headers(resource, 200, len(resource.content))
+
+    def do_GET(self):
+        resource = self._resource()
+        if resource is None:
+            self.send_error(404)
+            return
+        if self.headers.get("If-None-Match") == resource.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        content = resource.content
+        byte_range = self.headers.get("Range", "")
+        if self.headers.get("If-Range") not in (None, resource.etag, resource.last_modified):
+            # The client's partial copy is of an older version, send it all
+            byte_range = ""
+        if byte_range.startswith("bytes=") and byte_range.endswith("-"):
+            offset = int(byte_range[6:-1])
+            total = len(content)
+            content = content[offset:]
+            self._headers(
+                resource,
+                206,
+                len(content),
+                [("Content-Range", f"bytes {offset}-{total - 1}/{total}")],
+            )
+        else:
+            self._headers(resource, 200, len(content))
+        self.server.bytes_sent += len(content)
+        self.wfile.write(content)
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    HTTP server on localhost answering from a path to Resource mapping.
+
+    Supports HEAD, ETag revalidation and open-ended Range requests with
+    If-Range, which is what the HTTP cache and the PDF store use. Unknown paths are 404s,
+    so page variants that do not exist behave as on fia.com.
+
+    Args:
+        resources (dict): URL path to Resource
+        latency (float): Seconds added to every request
+    """
+
+    daemon_threads = True
+
+    def __init__(self, resources, latency=0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.resources = resources
+        self.latency = latency
+        self.requests = {}
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, method):
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+def load_recordings(directory):
+    """
+    Load recorded pages and PDFs, the path below `directory` being the URL path.
+
+    Files without an extension are served as HTML, so a saved event page
+    goes at events/fia-formula-one-world-championship/season-2024/<race>/eventtiming-information.
+    """
+    resources = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            url_path = "/" + os.path.relpath(path, directory).replace(os.sep, "/")
+            content_type = mimetypes.guess_type(name)[0] or "text/html; charset=utf-8"
+            with open(path, "rb") as f:
+                resources[url_path] = Resource(f.read(), content_type)
+    return resources
+
+
+def event_page(title, pdf_path, documents=40):
+    """An event timing page listing `documents` PDFs, one of them the Lap Chart."""
+    names = ["Race Classification", "Race Fastest Laps", "Race Pit Stop Summary", "Race History Chart"]
+    rows = [
+        '<li class="document-row"><a href="/sites/default/files/doc_{0}.pdf">'
+        '<div class="title">{1} - {2} {0}</div></a></li>'.format(i, title, names[i % len(names)])
+        for i in range(documents)
+    ]
+    rows.insert(
+        documents // 2,
+        f'<li class="document-row"><a href="{pdf_path}">'
+        f'<div class="title">{title} - Race Lap Chart</div></a></li>',
+    )
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        '<ul class="event-documents">' + "".join(rows) + "</ul></body></html>"
+    ).encode("utf-8")
+
+
+def chart_pdf(title, csv_content):
+    """A PDF printing the lap chart rows as text, so uploads carry realistic bytes."""
+    import pymupdf
+
+    with pymupdf.open() as document:
+        lines = [title, ""] + csv_content.splitlines()
+        per_page = 70
+        for start in range(0, len(lines), per_page):
+            page = document.new_page()
+            page.insert_text((36, 36), "\n".join(lines[start : start + per_page]), fontsize=8)
+        return document.tobytes()
+
+
+def raster_answers(resources, client, raster, dpi):
+    """
+    Answer the table images of every served PDF with the CSV of the PDF.
+
+    Rasterizing is deterministic, so the images the engine uploads for a
+    PDF have the digests computed here, and a rasterized run extracts the
+    same CSVs as one uploading the PDFs.
+
+    Args:
+        resources (dict): URL path to Resource, see ReplayServer
+        client (FakeClient): Client whose answers are extended
+        raster (str): Raster mode, see engines.RASTER_MODES
+        dpi (int): Resolution of the images
+    """
+    import tempfile
+
+    from engines import rasterize_table
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for path, resource in resources.items():
+            if resource.content_type != "application/pdf":
+                continue
+            csv_content = client.table(hashlib.sha256(resource.content).hexdigest())
+            pdf_file = os.path.join(out_dir, os.path.basename(path))
+            with open(pdf_file, "wb") as f:
+                f.write(resource.content)
+            for image in rasterize_table(pdf_file, out_dir, dpi, composite=raster == "composite"):
+                with open(image, "rb") as f:
+                    client.answers[hashlib.sha256(f.read()).hexdigest()] = csv_content
+
+
+def synthetic_races(csv_files, count, year=SYNTHETIC_YEAR):
+    """
+    Build `count` synthetic races cycling through archived lap charts.
+
+    Args:
+        csv_files (list): (year, race, path) tuples, see lap_store.archive_files
+        count (int): Number of races
+        year (int): Season the races are placed in
+
+    Returns:
+        tuple: (events, resources, answers) with the event names in race_id
+            order, the URL path to Resource mapping for ReplayServer and the
+            PDF digest to CSV mapping for FakeClient
+    """
+    events, resources, answers = [], {}, {}
+    for number in range(1, count + 1):
+        source_year, source_race, path = csv_files[(number - 1) % len(csv_files)]
+        with open(path, encoding="utf-8") as f:
+            csv_content = f.read().strip()
+        name = f"Benchmark {number} Grand Prix"
+        title = f"{year} {name} ({source_year} {source_race})"
+        pdf_path = f"/sites/default/files/{year}_benchmark_{number}_lap_chart.pdf"
+        pdf = chart_pdf(title, csv_content)
+        page_url = event_page_url(year, name.replace(" ", "-"), VARIANTS[number % 2])
+        page_path = page_url.split("://", 1)[1].split("/", 1)[1]
+        events.append(name)
+        resources["/" + page_path] = Resource(event_page(title, pdf_path), "text/html; charset=utf-8")
+        resources[pdf_path] = Resource(pdf, "application/pdf")
+        answers[hashlib.sha256(pdf).hexdigest()] = csv_content
+    return events, resources, answers
+
+
+class FakeApiError(Exception):
+    """Stands in for google.genai errors; `code` is the HTTP status."""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class _File:
+    def __init__(self, uri, mime_type, size_bytes):
+        self.uri = uri
+        self.name = uri
+        self.mime_type = mime_type
+        self.size_bytes = size_bytes
+
+
+class _Usage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class _Response:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class _Files:
+    def __init__(self, client):
+        self.client = client
+
+    def upload(self, file, **kwargs):
+        with open(file, "rb") as f:
+            content = f.read()
+        bandwidth = self.client.upload_bandwidth
+        time.sleep(self.client.upload_latency + (len(content) / bandwidth if bandwidth else 0))
+        digest = hashlib.sha256(content).hexdigest()
+        self.client.record("upload", bytes=len(content))
+        uri = f"fake://files/{digest}"
+        self.client.uploads[uri] = digest
+        mime_type = mimetypes.guess_type(file)[0] or "application/pdf"
+        return _File(uri, mime_type, len(content))
+
+
+class _Models:
+    def __init__(self, client):
+        self.client = client
+
+    def generate_content(self, model, contents, config=None, **kwargs):
+        return self.client.answer(model, contents)
+
+    def generate_content_stream(self, model, contents, config=None, **kwargs):
+        response = self.client.answer(model, contents, stream=True)
+        text = response.text
+        size = self.client.chunk_size
+        for start in range(0, len(text), size):
+            yield _Response(text[start : start + size], response.usage_metadata)
+
+
+class FakeClient:
+    """
+    Offline stand-in for `genai.Client`.
+
+    Uploaded files are identified by content digest and answered with the
+    CSV registered for them in `answers`; unknown files get an archived CSV
+    picked from their digest, so recorded PDFs work too. A batch request
+    with several "Document N:" parts is answered with one "=== TABLE N ==="
+    table each; the files of one document (e.g. the page images of a
+    rasterized chart) are answered by the first of them.
+
+    Args:
+        answers (dict): PDF sha256 digest to CSV text
+        fallback (list): CSV texts for files missing from `answers`
+        latency (float): Mean seconds a model request takes
+        jitter (float): Latency varies uniformly by this fraction either way
+        upload_latency (float): Seconds a file upload takes, on top of the transfer
+        rate_429 (float): Probability that a request fails with a 429
+        chunk_size (int): Characters per streamed chunk
+        seed (int): Seed of the latency and error injection
+        model_latency (dict): Model name to its mean latency, overriding `latency`
+        garble (dict): Model name to the probability that a table it returns
+            is missing a lap row
+        upload_bandwidth (float): Bytes per second uploads are sent at, None
+            for no transfer time
+    """
+
+    def __init__(
+        self,
+        answers,
+        fallback=(),
+        latency=1.0,
+        jitter=0.2,
+        upload_latency=0.05,
+        rate_429=0.0,
+        chunk_size=256,
+        seed=0,
+        model_latency=None,
+        garble=None,
+        upload_bandwidth=None,
+    ):
+        self.answers = answers
+        self.fallback = list(fallback)
+        self.latency = latency
+        self.jitter = jitter
+        self.upload_latency = upload_latency
+        self.rate_429 = rate_429
+        self.chunk_size = chunk_size
+        self.random = random.Random(seed)
+        self.model_latency = model_latency or {}
+        self.garble = garble or {}
+        self.upload_bandwidth = upload_bandwidth
+        self.uploads = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.files = _Files(self)
+        self.models = _Models(self)
+
+    def record(self, name, **values):
+        with self.lock:
+            entry = self.stats.setdefault(name, {"count": 0})
+            entry["count"] += 1
+            for key, value in values.items():
+                entry[key] = entry.get(key, 0) + value
+
+    def table(self, uri):
+        """Return the CSV answered for an uploaded file, or for a file digest."""
+        digest = self.uploads.get(uri, uri)
+        if digest in self.answers:
+            return self.answers[digest]
+        if not self.fallback:
+            return ""
+        return self.fallback[int(digest[-8:], 16) % len(self.fallback)]
+
+    def _garbled(self, table):
+        # Dropping LAP 3 breaks the lap sequence, like a skipped row would
+        lines = table.split("\n")
+        return "\n".join(lines[:4] + lines[5:])
+
+    def answer(self, model, contents, stream=False):
+        latency = self.model_latency.get(model, self.latency)
+        with self.lock:
+            delay = latency * (1 + self.jitter * (2 * self.random.random() - 1))
+            throttled = self.random.random() < self.rate_429
+            garbled = self.random.random() < self.garble.get(model, 0.0)
+        time.sleep(delay)
+        if throttled:
+            self.record("throttled")
+            raise FakeApiError(429, "RESOURCE_EXHAUSTED: requests per minute exceeded")
+
+        documents, prompt = [], ""
+        for content in contents:
+            for part in content.parts:
+                if part.file_data is not None:
+                    if not documents:
+                        documents.append([])
+                    documents[-1].append(part.file_data.file_uri)
+                elif part.text and part.text.startswith("Document "):
+                    documents.append([])
+                elif part.text:
+                    prompt += part.text
+        uris = [uri for document in documents for uri in document]
+        tables = [self.table(document[0]) for document in documents if document]
+        if garbled:
+            self.record("garbled")
+            tables = [self._garbled(table) for table in tables]
+        if len(tables) == 1:
+            text = f"```csv\n{tables[0]}\n```"
+        else:
+            text = "\n".join(
+                f"=== TABLE {number} ===\n{table}" for number, table in enumerate(tables, start=1)
+            )
+        usage = _Usage(258 * len(uris) + len(prompt) // 4, len(text) // 3)
+        self.record(
+            "stream" if stream else "generate",
+            **{model: 1},
+            model_seconds=delay,
+            prompt_tokens=usage.prompt_token_count,
+            output_tokens=usage.candidates_token_count,
+        )
+        return _Response(text, usage)
+
+
+def install_fake_client(client):
+    """Make `genai.Client(...)` return `client` for engines created afterwards."""
+    from google import genai
+
+    genai.Client = lambda *args, **kwargs: client
@@ -0,0 +1,1124 @@
+import contextvars
+import csv
+import io
+import itertools
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import telemetry
+from archive import RowChecker, check_csv_text
+from pipeline import StopPipeline
+from scheduler import QuotaExhausted, retry
+
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+GEMINI_MODEL = "gemini-2.5-pro-exp-03-25"
+
+# Cheaper model tried before GEMINI_MODEL when tiering is on, see TieredEngine
+GEMINI_FAST_MODEL = os.environ.get("GEMINI_FAST_MODEL", "gemini-2.5-flash")
+
+# Resolution of the table images uploaded instead of the PDF, see rasterize_table
+RASTER_DPI = int(os.environ.get("LAPCHART_RASTER_DPI", "150"))
+
+# "pages": one image per page, "composite": every page stacked into one image
+RASTER_MODES = ("pages", "composite")
+
+LAP_CHART_PROMPT = """Output the data in a csv format
+
+                                     The user wants to extract the table data from the provided image into a CSV format.
+
+1.  **Identify the table:** The image contains a large table titled \"Race Lap Chart\".
+2.  **Determine columns:** The columns are labeled \"POS\", \"1\", \"2\", \"3\", ..., \"20\". The \"POS\" column contains lap numbers (\"GRID\", \"LAP 1\", \"LAP 2\", etc.).
+3.  **Determine rows:** Each row represents a lap (starting from \"GRID\" which is the starting grid, then \"LAP 1\" ).
+4.  **Extract data:** Go through each row, from \"GRID\" , and extract the values for each corresponding position (columns 1 to 20).
+5.  **Handle special cases:** Notice the empty cells and cells with boxes around them. The OCR seems to handle them correctly as numbers. The boxes likely indicate pit stops or position changes, but for CSV extraction, just the numbers are needed.
+6.  **Format as CSV:** Arrange the extracted data with commas separating the values in each row and a newline character separating the rows. The first row should be the header row (\"POS\", \"1\", \"2\", ..., \"20\").
+
+**Data Extraction Plan:**
+- Read the header row: POS, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20
+- Read GRID row:
+- Read LAP 1 row:
+- ... and so on for each lap
+
+- Ensure the number of columns matches the header for each row."""
+
+
+def strip_csv_fences(text):
+    """Remove the ```csv fences the model wraps around its answer."""
+    csv_content = text.strip()
+    if csv_content.startswith("```csv"):
+        csv_content = csv_content[6:]  # Remove ```csv
+    if csv_content.endswith("```"):
+        csv_content = csv_content[:-3]  # Remove ```
+    return csv_content.strip()
+
+
+def pick_rows(csv_content, labels):
+    """Return the rows of a CSV table whose label is in `labels`, by label."""
+    wanted = set(labels)
+    rows = {}
+    for row in csv.reader(io.StringIO(csv_content or "")):
+        if row and row[0].strip() in wanted:
+            rows.setdefault(row[0].strip(), row)
+    return rows
+
+
+LAPS_PROMPT = """
+
+Output the header row, then only the following rows, exactly as labelled:
+{labels}"""
+
+
+RASTER_PROMPT = """
+
+The lap chart is split over {count} images cropped from consecutive pages,
+in order. Output them as one table; a row shown on two images only once."""
+
+
+class StreamAborted(Exception):
+    """Raised when a streamed table is abandoned because a row is invalid."""
+
+
+class ExtractionEngine:
+    """
+    Turns a lap chart PDF into CSV text.
+
+    Subclasses implement `extract`, returning the CSV in the archive layout
+    (POS header, GRID row, then LAP 1, LAP 2, ...) or None on failure.
+    """
+
+    name = None
+
+    def extract(self, pdf_file):
+        raise NotImplementedError
+
+    def extract_rows(self, pdf_file):
+        """
+        Yield the CSV lines of a lap chart as they become available.
+
+        Engines that can produce rows before the whole table is done
+        override this; the default yields the lines of `extract`.
+
+        Raises:
+            StreamAborted: The table went wrong part way through
+        """
+        csv_content = self.extract(pdf_file)
+        if csv_content:
+            yield from csv_content.split("\n")
+
+    def extract_laps(self, pdf_file, labels):
+        """
+        Extract only some rows of a lap chart, e.g. laps that failed validation.
+
+        Engines that can target rows override this; the default extracts
+        the whole table and picks the rows out.
+
+        Args:
+            pdf_file (str): Path to the PDF file
+            labels (list): Row labels wanted, e.g. ["GRID", "LAP 12"]
+
+        Returns:
+            dict: Label to CSV row (list of cells) for the rows found
+        """
+        return pick_rows(self.extract(pdf_file), labels)
+
+    def extract_batch(self, pdf_files):
+        """
+        Extract several lap charts.
+
+        Engines that can read several PDFs in one request override this.
+
+        Args:
+            pdf_files (list): Paths to the PDF files
+
+        Returns:
+            dict: PDF path to CSV text, None for PDFs that failed
+
+        Raises:
+            StopPipeline: When the run has to stop. Its `results` attribute,
+                if set, holds the tables read before, as returned above.
+        """
+        return {pdf_file: self.extract(pdf_file) for pdf_file in pdf_files}
+
+
+class GeminiEngine(ExtractionEngine):
+    """
+    Extract the table by uploading the PDF to a Gemini model.
+
+    In batch mode several PDFs go into one request and the model answers
+    with one delimited table per PDF. Tables that come back missing or
+    malformed are requested again, without the ones that were fine.
+
+    In streaming mode rows are checked as the response arrives and the
+    request is cancelled at the first row that breaks the table structure.
+
+    Args:
+        model (str): Model name
+        client: Object with the `genai.Client` interface, created from
+            GEMINI_API_KEY if None
+        batch_retries (int): Extra requests made for malformed batch tables
+        prompt (str): Instructions sent with each PDF
+        stream (bool): Stream the response and validate rows as they arrive
+        scheduler (QuotaScheduler): Paces model requests and retries transient
+            failures; requests go out unpaced if None
+        raster (str): Upload grayscale images of the table instead of the PDF,
+            one of RASTER_MODES, see rasterize_table; None uploads the PDF
+        dpi (int): Resolution of the table images
+        page (bool): The PDFs are single pages of longer charts, whose
+            streamed tables may start at any lap, see PagedEngine
+    """
+
+    name = "gemini"
+
+    # Lines of prose tolerated before the POS header of a streamed table
+    MAX_PREAMBLE = 5
+
+    def __init__(
+        self,
+        model=GEMINI_MODEL,
+        client=None,
+        batch_retries=2,
+        prompt=LAP_CHART_PROMPT,
+        stream=False,
+        scheduler=None,
+        raster=None,
+        dpi=RASTER_DPI,
+        page=False,
+    ):
+        self.model = model
+        self._client = client
+        self.batch_retries = batch_retries
+        self.prompt = prompt
+        self.stream = stream
+        self.scheduler = scheduler
+        self.raster = raster
+        self.dpi = dpi
+        self.page = page
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+
+            self._client = genai.Client(api_key=GEMINI_API_KEY)
+        return self._client
+
+    def _upload(self, pdf_file):
+        # Uploads do not count against the model quota, but are retried too
+        with telemetry.stage("file_upload", bytes=os.path.getsize(pdf_file)):
+            return retry(self.client.files.upload, file=pdf_file)
+
+    def _upload_table(self, pdf_file):
+        """Upload the table of a lap chart, as images when rasterizing; returns the files."""
+        if self.raster is None:
+            return [self._upload(pdf_file)]
+        with tempfile.TemporaryDirectory() as out_dir:
+            with telemetry.stage("rasterize", mode=self.raster, dpi=self.dpi) as record:
+                images = rasterize_table(
+                    pdf_file, out_dir, self.dpi, composite=self.raster == "composite"
+                )
+                record["bytes"] = sum(os.path.getsize(image) for image in images)
+            if images:
+                return [self._upload(image) for image in images]
+        print(f"No table found to crop in {pdf_file}, uploading the PDF")
+        return [self._upload(pdf_file)]
+
+    def _call(self, method, **kwargs):
+        if self.scheduler is None:
+            return method(**kwargs)
+        return self.scheduler.call(method, **kwargs)
+
+    def _timed_call(self, method, record, spent, **kwargs):
+        """
+        Make a request through _call, timing the request attempts alone.
+
+        The seconds of each attempt are appended to `spent` and retries are
+        counted in `record`. The rest of the time, spent waiting for the
+        quota and between retries, is recorded as a "quota_wait" stage so it
+        does not count as model latency.
+        """
+
+        def attempt(**kwargs):
+            start = time.perf_counter()
+            try:
+                return method(**kwargs)
+            finally:
+                spent.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        try:
+            with telemetry.collecting(record):
+                return self._call(attempt, **kwargs)
+        finally:
+            if self.scheduler is not None:
+                waited = time.perf_counter() - start - sum(spent)
+                telemetry.get_telemetry().record("quota_wait", waited, model=self.model)
+
+    def _generate(self, method, **kwargs):
+        record = {"model": self.model}
+        spent = []
+        ok = False
+        try:
+            response = self._timed_call(method, record, spent, **kwargs)
+            telemetry.record_usage(record, response)
+            ok = True
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            raise
+        finally:
+            telemetry.get_telemetry().record("model_generation", sum(spent), ok, **record)
+        return response
+
+    def _request(self, pdf_file, prompt=None):
+        from google.genai import types
+
+        # Upload the file, or the images of its table
+        files = self._upload_table(pdf_file)
+
+        prompt = prompt or self.prompt
+        if len(files) > 1:
+            prompt += RASTER_PROMPT.format(count=len(files))
+        contents = [
+            types.Content(
+                role="user",
+                parts=[
+                    *[
+                        types.Part.from_uri(file_uri=file.uri, mime_type=file.mime_type)
+                        for file in files
+                    ],
+                    types.Part.from_text(text=prompt),
+                ],
+            ),
+        ]
+
+        generate_content_config = types.GenerateContentConfig(
+            response_mime_type="text/plain",
+        )
+        return contents, generate_content_config
+
+    def extract(self, pdf_file):
+        if self.stream:
+            return "\n".join(self.extract_rows(pdf_file))
+
+        contents, generate_content_config = self._request(pdf_file)
+
+        # Generate content
+        response = self._generate(
+            self.client.models.generate_content,
+            model=self.model,
+            contents=contents,
+            config=generate_content_config,
+        )
+
+        return strip_csv_fences(response.text)
+
+    def extract_laps(self, pdf_file, labels):
+        # Asking for the rows alone keeps the answer, and its cost, small
+        prompt = self.prompt + LAPS_PROMPT.format(labels=", ".join(labels))
+        contents, generate_content_config = self._request(pdf_file, prompt)
+        response = self._generate(
+            self.client.models.generate_content,
+            model=self.model,
+            contents=contents,
+            config=generate_content_config,
+        )
+        return pick_rows(strip_csv_fences(response.text), labels)
+
+    def _open_stream(self, **kwargs):
+        # generate_content_stream is a generator: the request is only sent
+        # when the first chunk is read. Reading it here, inside the scheduler
+        # call, lets 429s be retried and daily quota errors trip the breaker.
+        stream = self.client.models.generate_content_stream(**kwargs)
+        try:
+            return stream, [next(stream)]
+        except StopIteration:
+            return stream, []
+        except BaseException:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+            raise
+
+    def _stream_lines(self, pdf_file):
+        contents, generate_content_config = self._request(pdf_file)
+        # The stream is timed by hand: it stays open while the caller works
+        # on the rows, so it cannot hold a telemetry stage open
+        record = {"model": self.model, "stream": True}
+        spent = []
+        try:
+            stream, head = self._timed_call(
+                self._open_stream,
+                record,
+                spent,
+                model=self.model,
+                contents=contents,
+                config=generate_content_config,
+            )
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            telemetry.get_telemetry().record("model_generation", sum(spent), False, **record)
+            raise
+        # Waiting for the quota is not model time, see _timed_call
+        start = time.perf_counter() - sum(spent)
+        buffer = ""
+        ok = False
+        try:
+            for chunk in itertools.chain(head, stream):
+                telemetry.record_usage(record, chunk)
+                buffer += chunk.text or ""
+                *lines, buffer = buffer.split("\n")
+                yield from lines
+            if buffer:
+                yield buffer
+            ok = True
+        finally:
+            # Closing the stream cancels the request when we stop early
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+            telemetry.get_telemetry().record(
+                "model_generation", time.perf_counter() - start, ok, **record
+            )
+
+    def extract_rows(self, pdf_file):
+        if not self.stream:
+            yield from super().extract_rows(pdf_file)
+            return
+
+        checker = RowChecker(page=self.page)
+        preamble = 0
+        lines = self._stream_lines(pdf_file)
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line or line.startswith("```"):
+                    continue
+                row = next(csv.reader([line]))
+                if checker.positions is None and row[0] != "POS":
+                    preamble += 1
+                    if preamble > self.MAX_PREAMBLE:
+                        raise StreamAborted("no POS header at the start of the response")
+                    continue
+                problem = checker.check(row)
+                if problem:
+                    raise StreamAborted(problem)
+                yield line
+        finally:
+            lines.close()
+
+    def _request_batch(self, pdf_files):
+        from google.genai import types
+
+        parts = []
+        for number, pdf_file in enumerate(pdf_files, start=1):
+            parts.append(types.Part.from_text(text=f"Document {number}:"))
+            for uploaded in self._upload_table(pdf_file):
+                parts.append(
+                    types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type)
+                )
+        parts.append(
+            types.Part.from_text(
+                text=self.prompt + BATCH_PROMPT.format(count=len(pdf_files))
+            )
+        )
+
+        response = self._generate(
+            self.client.models.generate_content,
+            model=self.model,
+            contents=[types.Content(role="user", parts=parts)],
+            config=types.GenerateContentConfig(response_mime_type="text/plain"),
+        )
+        tables = split_batch_response(response.text)
+        return {
+            pdf_file: tables.get(number) for number, pdf_file in enumerate(pdf_files, start=1)
+        }
+
+    def extract_batch(self, pdf_files):
+        results = {pdf_file: None for pdf_file in pdf_files}
+        pending = list(pdf_files)
+        for attempt in range(self.batch_retries + 1):
+            if not pending:
+                break
+            # The tables accepted so far were paid for: a failed request only
+            # costs the tables it carried
+            try:
+                if len(pending) == 1:
+                    tables = {pending[0]: self.extract(pending[0])}
+                else:
+                    tables = self._request_batch(pending)
+            except StopPipeline as e:
+                e.results = results
+                raise
+            except Exception as e:
+                print(f"Request for {len(pending)} tables failed: {e}")
+                tables = {}
+                break
+
+            malformed = []
+            for pdf_file in pending:
+                csv_content = tables.get(pdf_file)
+                if csv_content and not check_csv_text(csv_content):
+                    results[pdf_file] = csv_content
+                else:
+                    malformed.append(pdf_file)
+            if malformed:
+                print(f"{len(malformed)} of {len(pending)} tables malformed: {malformed}")
+            pending = malformed
+
+        # Hand back the last answer for tables that never passed the check
+        for pdf_file in pending:
+            results[pdf_file] = results[pdf_file] or tables.get(pdf_file)
+        return results
+
+
+BATCH_PROMPT = """
+
+The request contains {count} documents, each preceded by "Document N:".
+Extract the lap chart of every document. Start each table with a line
+"=== TABLE N ===" where N is the document number, followed by its CSV.
+Output nothing else between the tables."""
+
+_TABLE_DELIMITER = re.compile(r"^=+\s*TABLE\s+(\d+)\s*=+\s*$", re.MULTILINE)
+
+
+def split_batch_response(text):
+    """
+    Split a batch answer into the CSV of each document.
+
+    Args:
+        text (str): Model response with "=== TABLE N ===" delimiters
+
+    Returns:
+        dict: Document number to CSV text
+    """
+    tables = {}
+    matches = list(_TABLE_DELIMITER.finditer(text))
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(text)
+        tables[int(match.group(1))] = strip_csv_fences(text[match.end() : end])
+    return tables
+
+
+_LAP_LABEL = re.compile(r"^(?:GRID|LAP\s*(\d+))$")
+
+
+def _group_lines(words, tolerance):
+    """Group PDF words into text lines by the vertical centre of their boxes."""
+    lines = []
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        centre = (word[1] + word[3]) / 2
+        if lines and abs(lines[-1][0] - centre) <= tolerance:
+            lines[-1][1].append(word)
+        else:
+            lines.append([centre, [word]])
+    return [sorted(line, key=lambda w: w[0]) for _, line in lines]
+
+
+def _parse_header(line):
+    """Return the x centres of the position columns if `line` is the POS header."""
+    texts = [w[4] for w in line]
+    if not texts or texts[0] != "POS":
+        return None
+    numbers = [w for w in line[1:] if w[4].isdigit()]
+    if [int(w[4]) for w in numbers] != list(range(1, len(numbers) + 1)):
+        return None
+    return [(w[0] + w[2]) / 2 for w in numbers]
+
+
+def _parse_row(line, columns):
+    """Split a GRID / LAP N line into its label and one cell per column."""
+    label_words = []
+    rest = list(line)
+    # The label is either one word ("GRID", "LAP1") or two ("LAP", "1")
+    for size in (1, 2):
+        candidate = " ".join(w[4] for w in line[:size])
+        match = _LAP_LABEL.match(candidate)
+        if match:
+            label_words = line[:size]
+            rest = line[size:]
+            label = f"LAP {int(match.group(1))}" if match.group(1) else "GRID"
+            break
+    if not label_words:
+        return None, None
+
+    half_width = (columns[1] - columns[0]) / 2 if len(columns) > 1 else 10
+    cells = [""] * len(columns)
+    for word in rest:
+        if not word[4].isdigit():
+            continue
+        centre = (word[0] + word[2]) / 2
+        index = min(range(len(columns)), key=lambda i: abs(columns[i] - centre))
+        if abs(columns[index] - centre) <= half_width:
+            cells[index] = word[4]
+    return label, cells
+
+
+_TABLE_ROW = re.compile(r"^(?:POS|GRID|LAP)")
+
+
+def table_regions(pdf_file, margin=4):
+    """
+    Find the lap chart table on every page of a PDF.
+
+    The table is the box around the text lines starting with POS, GRID or
+    LAP; titles, logos and footers fall outside it.
+
+    Args:
+        pdf_file (str): Path to the PDF file
+        margin (float): Points added around the table on every side
+
+    Returns:
+        list: (page number, pymupdf.Rect) for the pages showing table rows
+    """
+    import pymupdf
+
+    regions = []
+    with pymupdf.open(pdf_file) as document:
+        for page in document:
+            words = page.get_text("words")
+            if not words:
+                continue
+            heights = sorted(w[3] - w[1] for w in words)
+            tolerance = heights[len(heights) // 2] * 0.4
+            rows = [
+                word
+                for line in _group_lines(words, tolerance)
+                if _TABLE_ROW.match(line[0][4])
+                for word in line
+            ]
+            if not rows:
+                continue
+            rect = pymupdf.Rect(
+                min(w[0] for w in rows) - margin,
+                min(w[1] for w in rows) - margin,
+                max(w[2] for w in rows) + margin,
+                max(w[3] for w in rows) + margin,
+            )
+            regions.append((page.number, rect & page.rect))
+    return regions
+
+
+def rasterize_table(pdf_file, out_dir, dpi=RASTER_DPI, composite=False):
+    """
+    Render the lap chart table of a PDF to grayscale PNG images.
+
+    Args:
+        pdf_file (str): Path to the PDF file
+        out_dir (str): Directory receiving the images
+        dpi (int): Resolution of the images
+        composite (bool): Stack the table parts of all pages into one image
+            instead of writing one image per page
+
+    Returns:
+        list: Paths of the images in page order, empty if no table was found
+    """
+    import pymupdf
+
+    regions = table_regions(pdf_file)
+    if not regions:
+        return []
+    base = os.path.splitext(os.path.basename(pdf_file))[0]
+    paths = []
+    with pymupdf.open(pdf_file) as document:
+        if composite:
+            with pymupdf.open() as sheet:
+                width = max(rect.width for _, rect in regions)
+                page = sheet.new_page(width=width, height=sum(rect.height for _, rect in regions))
+                top = 0
+                for number, rect in regions:
+                    target = pymupdf.Rect(0, top, rect.width, top + rect.height)
+                    page.show_pdf_page(target, document, number, clip=rect)
+                    top += rect.height
+                path = os.path.join(out_dir, f"{base}_table.png")
+                page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY).save(path)
+                paths.append(path)
+        else:
+            for number, rect in regions:
+                pixmap = document[number].get_pixmap(dpi=dpi, clip=rect, colorspace=pymupdf.csGRAY)
+                path = os.path.join(out_dir, f"{base}_table{number + 1}.png")
+                pixmap.save(path)
+                paths.append(path)
+    return paths
+
+
+class LocalEngine(ExtractionEngine):
+    """
+    Rebuild the table from the text glyph coordinates of a vector PDF.
+
+    FIA lap charts are text-based PDFs laid out on a fixed grid: a POS header
+    with one column per position, then a GRID row and one row per lap. Words
+    are grouped into lines by their vertical position and assigned to the
+    nearest header column. No network access, no quota.
+    """
+
+    name = "local"
+
+    def extract(self, pdf_file):
+        import pymupdf
+
+        columns = None
+        rows = {}
+        order = []
+        with pymupdf.open(pdf_file) as document:
+            for page in document:
+                words = page.get_text("words")
+                if not words:
+                    continue
+                heights = sorted(w[3] - w[1] for w in words)
+                tolerance = heights[len(heights) // 2] * 0.4
+                for line in _group_lines(words, tolerance):
+                    header = _parse_header(line)
+                    if header:
+                        columns = header
+                        continue
+                    if columns is None:
+                        continue
+                    label, cells = _parse_row(line, columns)
+                    # Pages can repeat the last lap of the previous page
+                    if label is not None and label not in rows:
+                        rows[label] = cells
+                        order.append(label)
+
+        if columns is None or "GRID" not in rows:
+            print(f"Could not find the lap chart table in {pdf_file}")
+            return None
+
+        lines = [",".join(["POS"] + [str(i) for i in range(1, len(columns) + 1)])]
+        lines.append(",".join(["GRID"] + rows["GRID"]))
+        laps = sorted((label for label in order if label != "GRID"), key=lambda l: int(l[4:]))
+        for label in laps:
+            lines.append(",".join([label] + rows[label]))
+        return "\n".join(lines)
+
+    def extract_laps(self, pdf_file, labels):
+        # Reading the same glyphs again gives the same rows
+        return {}
+
+
+class FallbackEngine(ExtractionEngine):
+    """Try several engines in order and return the first structurally valid result."""
+
+    name = "auto"
+
+    def __init__(self, *engines):
+        self.engines = engines
+
+    def extract(self, pdf_file):
+        for engine in self.engines:
+            try:
+                csv_content = engine.extract(pdf_file)
+            except StopPipeline:
+                raise
+            except Exception as e:
+                print(f"Engine {engine.name} failed on {pdf_file}: {e}")
+                continue
+            if not csv_content:
+                print(f"Engine {engine.name} returned no table for {pdf_file}")
+                continue
+            problems = check_csv_text(csv_content)
+            if not problems:
+                return csv_content
+            print(f"Engine {engine.name} output for {pdf_file} is invalid: {problems}")
+        return None
+
+    def extract_laps(self, pdf_file, labels):
+        rows = {}
+        for engine in self.engines:
+            missing = [label for label in labels if label not in rows]
+            if not missing:
+                break
+            try:
+                rows.update(engine.extract_laps(pdf_file, missing))
+            except StopPipeline:
+                raise
+            except Exception as e:
+                print(f"Engine {engine.name} failed on {pdf_file}: {e}")
+        return rows
+
+
+def check_tier_output(csv_content):
+    """
+    Check a table closely enough to accept it from a cheaper model.
+
+    On top of check_csv_text (POS header, GRID first, no more cars than
+    columns, consecutive lap labels), every car listed in a lap has to be
+    on the GRID.
+
+    Returns:
+        list: Descriptions of the problems found, empty if the table passes
+    """
+    if not csv_content:
+        return ["no table"]
+    problems = check_csv_text(csv_content)
+    if problems:
+        return problems
+    rows = [row for row in csv.reader(io.StringIO(csv_content)) if row]
+    grid = {cell for cell in rows[1][1:] if cell}
+    for row in rows[2:]:
+        strangers = sorted({cell for cell in row[1:] if cell} - grid, key=int)
+        if strangers:
+            problems.append(f"{row[0]}: car {', '.join(strangers)} not on the grid")
+    return problems
+
+
+class TieredEngine(ExtractionEngine):
+    """
+    Read every table with the cheapest model first, escalating on bad output.
+
+    Tiers are tried in order until one returns a table passing
+    check_tier_output. The last tier's answer is kept even if it fails the
+    check, as before tiering, so the suspect row repair can work on it.
+    Suspect rows are re-extracted by the last tier. A tier whose quota is
+    used up is skipped; the run only stops when the last tier's quota is.
+
+    Every attempt is recorded as a telemetry stage named "tier_<name>",
+    failed when the table had to be escalated, so the calls and failures
+    counters give the success rate of each tier (see tier_report).
+
+    Args:
+        tiers (list): (name, engine) pairs, cheapest first
+    """
+
+    name = "tiered"
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+
+    def _judge(self, name, engine, csv_content, seconds, error=None):
+        problems = [error] if error else check_tier_output(csv_content)
+        fields = {"model": getattr(engine, "model", engine.name)}
+        if problems:
+            fields["problems"] = problems[:3]
+        telemetry.get_telemetry().record(f"tier_{name}", seconds, not problems, **fields)
+        return problems
+
+    def extract(self, pdf_file):
+        for index, (name, engine) in enumerate(self.tiers):
+            last = index == len(self.tiers) - 1
+            start = time.perf_counter()
+            error = None
+            try:
+                csv_content = engine.extract(pdf_file)
+            except QuotaExhausted as e:
+                if last:
+                    raise
+                print(f"Skipping the {name} tier: {e}")
+                continue
+            except StopPipeline:
+                raise
+            except Exception as e:
+                if last:
+                    raise
+                csv_content, error = None, f"{type(e).__name__}: {e}"
+            problems = self._judge(name, engine, csv_content, time.perf_counter() - start, error)
+            if not problems or last:
+                return csv_content
+            print(f"Escalating {pdf_file} from the {name} tier: {'; '.join(problems[:3])}")
+        return None
+
+    def extract_laps(self, pdf_file, labels):
+        return self.tiers[-1][1].extract_laps(pdf_file, labels)
+
+    def extract_batch(self, pdf_files):
+        results = {pdf_file: None for pdf_file in pdf_files}
+        pending = list(pdf_files)
+        for index, (name, engine) in enumerate(self.tiers):
+            if not pending:
+                break
+            last = index == len(self.tiers) - 1
+            start = time.perf_counter()
+            try:
+                tables = engine.extract_batch(pending)
+            except StopPipeline as e:
+                # Tables this tier read before it stopped were paid for
+                read = {
+                    pdf_file: csv_content
+                    for pdf_file, csv_content in (getattr(e, "results", None) or {}).items()
+                    if csv_content and (last or not check_tier_output(csv_content))
+                }
+                results.update(read)
+                pending = [pdf_file for pdf_file in pending if pdf_file not in read]
+                if last or not isinstance(e, QuotaExhausted):
+                    e.results = {
+                        pdf_file: None if pdf_file in pending else csv_content
+                        for pdf_file, csv_content in results.items()
+                    }
+                    raise
+                print(f"Skipping the {name} tier: {e}")
+                continue
+            except Exception as e:
+                if last:
+                    raise
+                print(f"The {name} tier failed on {len(pending)} tables: {e}")
+                tables = {}
+            # The tables of a batch share one request, so each gets its share of the time
+            seconds = (time.perf_counter() - start) / len(pending)
+            escalated = []
+            for pdf_file in pending:
+                csv_content = tables.get(pdf_file)
+                results[pdf_file] = csv_content
+                if self._judge(name, engine, csv_content, seconds) and not last:
+                    escalated.append(pdf_file)
+            if escalated:
+                print(f"Escalating {len(escalated)} of {len(pending)} tables from the {name} tier")
+            pending = escalated
+        return results
+
+
+def tier_report(totals):
+    """
+    Describe how often each model tier produced an accepted table.
+
+    Args:
+        totals (dict): Telemetry.totals of the run
+
+    Returns:
+        list: One line per tier
+    """
+    lines = []
+    for stage, counts in totals.items():
+        if stage.startswith("tier_") and counts["calls"]:
+            accepted = counts["calls"] - counts["failures"]
+            lines.append(
+                f"{stage[5:]} tier: {accepted} of {counts['calls']} tables accepted "
+                f"({accepted / counts['calls']:.0%})"
+            )
+    return lines
+
+
+PAGE_PROMPT = """
+
+This document is a single page of a longer lap chart. Output the header row,
+then only the rows printed on this page: the GRID row only if it appears on
+this page, and the LAP rows exactly as labelled on the page."""
+
+
+def split_pdf_pages(pdf_file, out_dir):
+    """
+    Write every page of a PDF to its own single-page PDF.
+
+    Args:
+        pdf_file (str): Path to the PDF file
+        out_dir (str): Directory receiving the page files
+
+    Returns:
+        list: Paths of the page files in page order
+    """
+    import pymupdf
+
+    base = os.path.splitext(os.path.basename(pdf_file))[0]
+    paths = []
+    with pymupdf.open(pdf_file) as document:
+        for number in range(document.page_count):
+            with pymupdf.open() as page_document:
+                page_document.insert_pdf(document, from_page=number, to_page=number)
+                path = os.path.join(out_dir, f"{base}_page{number + 1}.pdf")
+                page_document.save(path)
+            paths.append(path)
+    return paths
+
+
+_PAGE_LAP = re.compile(r"\bLAP\s*(\d+)\b")
+
+
+def page_labels(pdf_file):
+    """
+    Find the rows printed on each page of a lap chart PDF.
+
+    Returns:
+        list: Set of row labels ("GRID", "LAP N") of each page, in page order
+    """
+    import pymupdf
+
+    pages = []
+    with pymupdf.open(pdf_file) as document:
+        for page in document:
+            text = page.get_text()
+            labels = {f"LAP {int(number)}" for number in _PAGE_LAP.findall(text)}
+            if re.search(r"\bGRID\b", text):
+                labels.add("GRID")
+            pages.append(labels)
+    return pages
+
+
+def _lap_number(label):
+    return int(label[4:]) if label.startswith("LAP ") and label[4:].isdigit() else None
+
+
+def stitch_pages(tables):
+    """
+    Join the per-page tables of a lap chart into one CSV.
+
+    Checks continuity at every page boundary: laps repeated on the next page
+    are dropped, a lap missing between two pages makes the stitch fail.
+
+    Args:
+        tables (list): CSV text of each page, in page order
+
+    Returns:
+        str: The combined CSV, None if a lap is missing or a row is unreadable
+    """
+    header = None
+    grid = None
+    laps = []
+    for page, table in enumerate(tables, start=1):
+        if not table:
+            print(f"Page {page} returned no table")
+            return None
+        for row in csv.reader(io.StringIO(table)):
+            if not row:
+                continue
+            label = row[0].strip()
+            if label == "POS":
+                header = header or row
+            elif label == "GRID":
+                grid = grid or row
+            elif _lap_number(label) is None:
+                print(f"Page {page} has an unexpected row: {label!r}")
+                return None
+            elif laps and _lap_number(label) <= _lap_number(laps[-1][0]):
+                # Pages can repeat the last lap of the previous page
+                continue
+            elif _lap_number(label) != (_lap_number(laps[-1][0]) + 1 if laps else 1):
+                previous = laps[-1][0] if laps else "GRID"
+                print(f"Page {page}: {label} follows {previous}, laps are missing")
+                return None
+            else:
+                laps.append(row)
+
+    if header is None or grid is None:
+        print("Pages do not contain the POS header and GRID row")
+        return None
+    return "\n".join(",".join(row) for row in [header, grid] + laps)
+
+
+class PagedEngine(ExtractionEngine):
+    """
+    Extract long lap charts page by page.
+
+    The PDF is split into single pages that are extracted concurrently, and
+    the page tables are stitched back together with continuity checks at the
+    page boundaries. Each page is its own model request, paced by the page
+    engine's scheduler.
+
+    Args:
+        engine (ExtractionEngine): Engine reading a single page
+        workers (int): Pages extracted at the same time
+    """
+
+    def __init__(self, engine, workers=4):
+        self.engine = engine
+        self.workers = workers
+        self.name = f"{engine.name}-paged"
+
+    def _extract_page(self, page_file):
+        return self.engine.extract(page_file)
+
+    def extract_laps(self, pdf_file, labels):
+        # Only the pages printing a wanted row are sent again
+        pages = page_labels(pdf_file)
+        wanted = {
+            number: sorted(labels_on_page & set(labels), key=lambda l: _lap_number(l) or 0)
+            for number, labels_on_page in enumerate(pages)
+        }
+        wanted = {number: page_rows for number, page_rows in wanted.items() if page_rows}
+        if not wanted:
+            return self.engine.extract_laps(pdf_file, labels)
+
+        rows = {}
+        with tempfile.TemporaryDirectory() as out_dir:
+            page_files = split_pdf_pages(pdf_file, out_dir)
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # Each page runs in a copy of our context, so its telemetry
+                # records keep the race and count retries
+                futures = [
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        self.engine.extract_laps,
+                        page_files[number],
+                        page_rows,
+                    )
+                    for number, page_rows in wanted.items()
+                ]
+                for future in futures:
+                    for label, row in future.result().items():
+                        rows.setdefault(label, row)
+        return rows
+
+    def extract(self, pdf_file):
+        with tempfile.TemporaryDirectory() as out_dir:
+            page_files = split_pdf_pages(pdf_file, out_dir)
+            if len(page_files) == 1:
+                return self._extract_page(pdf_file)
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # See extract_laps for the copied context
+                futures = [
+                    executor.submit(contextvars.copy_context().run, self._extract_page, page_file)
+                    for page_file in page_files
+                ]
+                tables = [future.result() for future in futures]
+        return stitch_pages(tables)
+
+
+ENGINES = ("gemini", "local", "auto")
+
+
+def get_engine(
+    name="gemini",
+    paged=False,
+    stream=False,
+    scheduler=None,
+    fast_model=None,
+    fast_scheduler=None,
+    raster=None,
+    dpi=RASTER_DPI,
+):
+    """
+    Build an extraction engine by name.
+
+    Args:
+        name (str): "gemini", "local", or "auto" (local first, Gemini as fallback)
+        paged (bool): Send Gemini one page at a time, see PagedEngine
+        stream (bool): Stream Gemini responses, see GeminiEngine
+        scheduler (QuotaScheduler): Paces Gemini requests, see GeminiEngine
+        fast_model (str): Try this model before GEMINI_MODEL, see TieredEngine
+        fast_scheduler (QuotaScheduler): Paces the fast model's requests,
+            which have a quota of their own
+        raster (str): Upload table images instead of PDFs, see GeminiEngine
+        dpi (int): Resolution of the table images
+
+    Returns:
+        ExtractionEngine: The engine
+    """
+
+    def build_gemini(model, model_scheduler):
+        if paged:
+            return PagedEngine(
+                GeminiEngine(
+                    model=model,
+                    prompt=LAP_CHART_PROMPT + PAGE_PROMPT,
+                    stream=stream,
+                    scheduler=model_scheduler,
+                    raster=raster,
+                    dpi=dpi,
+                    page=True,
+                )
+            )
+        return GeminiEngine(
+            model=model, stream=stream, scheduler=model_scheduler, raster=raster, dpi=dpi
+        )
+
+    gemini = build_gemini(GEMINI_MODEL, scheduler)
+    if fast_model:
+        gemini = TieredEngine([("fast", build_gemini(fast_model, fast_scheduler)), ("pro", gemini)])
+
+    if name == "gemini":
+        return gemini
+    if name == "local":
+        return LocalEngine()
+    if name == "auto":
+        return FallbackEngine(LocalEngine(), gemini)
+    raise ValueError(f"Unknown extraction engine: {name}")
@@ -1,31 +1,168 @@
+import argparse
+import csv
+import io
 import os
-import re
-import time
-import requests
-from bs4 import BeautifulSoup
 import base64
 
-from google import genai
-from google.genai import types
-import utils
-
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+import http_cache
+import profiling
+import seasons
+import telemetry
+from analytics import race_metrics
+from archive import build_work_plan, print_plan
+from engines import (
+    ENGINES,
+    GEMINI_FAST_MODEL,
+    RASTER_DPI,
+    RASTER_MODES,
+    StreamAborted,
+    get_engine,
+    tier_report,
+)
+from lap_store import archive_files, build_store, export_arrow, export_parquet
+from links import LINK_TEXT, find_document_link, index_pdf_links
+from pdf_store import get_pdf_store
+from pipeline import Stage, StopPipeline, run_pipeline
+from render import render_races
+from resolver import VARIANTS, event_page_url, get_url_resolver
+from scheduler import QuotaScheduler, TransientError, retry
+from validate import format_laps, print_archive_report, validate_archive, validate_rows
 
 
 def race_url(year, race_id):
     # no logic on which url they use, try both and see which one works
     # Docs only available from 2021 season onwards, 2020 Abu Dhabi unavailable
 
-    import utils
-
-    race_name = utils.get_events(year)[race_id - 1]
+    race_name = seasons.event_name(year, race_id)
     race_name = race_name.replace(" ", "-")
-    fia_url1 = f"https://www.fia.com/events/fia-formula-one-world-championship/season-{year}/{race_name}/eventtiming-information"
-    fia_url2 = f"https://www.fia.com/events/fia-formula-one-world-championship/season-{year}/{race_name}/eventtiming"
+    fia_url1 = event_page_url(year, race_name, VARIANTS[0])
+    fia_url2 = event_page_url(year, race_name, VARIANTS[1])
 
     return fia_url1, fia_url2
 
 
+def find_race_pdf_link(year, race_name):
+    """
+    Find the Lap Chart PDF link of a race.
+
+    Both FIA page variants are probed at once and the one that worked is
+    remembered for the next run, see resolver.UrlResolver.
+
+    Args:
+        year (int): The year of the race
+        race_name (str): Event name as returned by seasons.get_events
+
+    Returns:
+        str: Absolute URL of the Lap Chart PDF, None if no page had one
+    """
+
+    race = telemetry.current_race()
+
+    def probe(url):
+        # Probes run on the resolver's threads, which do not see the race
+        with telemetry.race(race):
+            html_content = fetch_event_page(url)
+            if html_content is None:
+                return None
+            return find_lap_chart_link(html_content, url)
+
+    with telemetry.stage("link_resolution"):
+        _, pdf_url = get_url_resolver().resolve(year, race_name, probe)
+    return pdf_url
+
+
+def _get_page(url):
+    response = http_cache.get(url)
+    # Server errors and rate limiting from fia.com are usually short-lived
+    if response.status_code >= 500 or response.status_code == 429:
+        raise TransientError(f"HTTP {response.status_code} from {url}", response.status_code)
+    return response
+
+
+def fetch_event_page(url):
+    """
+    Fetch the HTML of an FIA event timing page.
+
+    Args:
+        url (str): The URL of the FIA event page
+
+    Returns:
+        str: The HTML content if successful, None otherwise
+    """
+    print(f"Fetching content from: {url}")
+    with telemetry.stage("page_fetch", url=url) as record:
+        response = retry(_get_page, url)
+        record["status"] = response.status_code
+        record["bytes"] = len(response.content)
+        record["cached"] = getattr(response, "from_cache", False)
+
+    if response.status_code != 200:
+        print(f"Failed to fetch the URL. Status code: {response.status_code}")
+        return None
+
+    return response.text
+
+
+def find_lap_chart_link(html_content, url):
+    """
+    Find the absolute URL of the Lap Chart PDF in an FIA event page.
+
+    Args:
+        html_content (str): The HTML of the FIA event page
+        url (str): The URL the page was fetched from, used to resolve relative links
+
+    Returns:
+        str: Absolute URL of the Lap Chart PDF, None if no link was found
+    """
+    # Index every document link of the page in one pass
+    with telemetry.stage("html_parse", bytes=len(html_content)):
+        index = index_pdf_links(html_content)
+    lap_chart_link = find_document_link(index, "Lap Chart")
+
+    if not lap_chart_link:
+        print("Could not find a link to the Lap Chart PDF.")
+
+        # As a fallback, print all PDF links found
+        print("\nAll PDF links found in the document:")
+        for kind, title, href in index:
+            if kind == LINK_TEXT:
+                print(f"Text: {title.strip() or 'No text'}")
+                print(f"URL: {href}\n")
+
+        return None
+
+    # Make sure the URL is absolute
+    if not lap_chart_link.startswith(("http://", "https://")):
+        # If it's a relative URL, make it absolute
+        base_url = "/".join(url.split("/")[:3])  # Get the base URL (e.g., https://www.fia.com)
+        if lap_chart_link.startswith("/"):
+            lap_chart_link = base_url + lap_chart_link
+        else:
+            lap_chart_link = base_url + "/" + lap_chart_link
+
+    return lap_chart_link
+
+
+def download_pdf(pdf_url, year, race_name):
+    """
+    Download a Lap Chart PDF into the local PDF store.
+
+    The download is skipped when the stored copy for this race is still
+    current according to a HEAD request.
+
+    Args:
+        pdf_url (str): Absolute URL of the Lap Chart PDF
+        year (int): The year of the race
+        race_name (str): The name of the race
+
+    Returns:
+        str: Path to the downloaded PDF file if successful, None otherwise
+    """
+    print(f"Downloading Lap Chart PDF from: {pdf_url}")
+    with telemetry.stage("pdf_download", url=pdf_url):
+        return get_pdf_store().fetch(pdf_url, year, race_name)
+
+
 def download_lap_chart_pdf(url, year, race_name):
     """
     Download the Lap Chart PDF from the given URL.
@@ -39,196 +176,224 @@ def download_lap_chart_pdf(url, year, race_name):
         str: Path to the downloaded PDF file if successful, None otherwise
     """
     try:
-        # Fetch the HTML content from the URL
-        print(f"Fetching content from: {url}")
-        response = requests.get(url)
-
-        if response.status_code != 200:
-            print(f"Failed to fetch the URL. Status code: {response.status_code}")
+        html_content = fetch_event_page(url)
+        if html_content is None:
             return None
 
-        html_content = response.text
-
-        # Parse the HTML content
-        soup = BeautifulSoup(html_content, "html.parser")
-
-        # Find all links that might contain PDFs
-        links = soup.find_all("a", href=re.compile(r"\.pdf$"))
-
-        # Look for the link with "Lap Chart" text
-        lap_chart_link = None
-        for link in links:
-            # Check if the link text contains "Lap Chart"
-            if link.text and "Lap Chart" in link.text:
-                lap_chart_link = link["href"]
-                break
-
-        # If we couldn't find it by link text, look for divs with "Lap Chart" title
-        # that might be near links
-        if not lap_chart_link:
-            lap_chart_divs = soup.find_all(
-                string=lambda text: text and "Lap Chart" in text
-            )
-            for text in lap_chart_divs:
-                # Look for nearby links
-                parent = text.parent
-                pdf_link = parent.find("a", href=re.compile(r"\.pdf$"))
-                if pdf_link:
-                    lap_chart_link = pdf_link["href"]
-                    break
-
-        # If we still couldn't find it, try to find any div with class "title" containing "Lap Chart"
-        if not lap_chart_link:
-            title_divs = soup.find_all("div", class_="title")
-            for div in title_divs:
-                if div.text and "Lap Chart" in div.text:
-                    # Look for nearby links
-                    parent = div.parent
-                    pdf_link = parent.find("a", href=re.compile(r"\.pdf$"))
-                    if pdf_link:
-                        lap_chart_link = pdf_link["href"]
-                        break
-
-        if lap_chart_link:
-            # Make sure the URL is absolute
-            if not lap_chart_link.startswith(("http://", "https://")):
-                # If it's a relative URL, make it absolute
-                base_url = "/".join(
-                    url.split("/")[:3]
-                )  # Get the base URL (e.g., https://www.fia.com)
-                if lap_chart_link.startswith("/"):
-                    lap_chart_link = base_url + lap_chart_link
-                else:
-                    lap_chart_link = base_url + "/" + lap_chart_link
-
-            # Download the PDF
-            print(f"Downloading Lap Chart PDF from: {lap_chart_link}")
-            pdf_response = requests.get(lap_chart_link)
-
-            if pdf_response.status_code == 200:
-                # Save the PDF with a more descriptive filename
-                filename = f"{year}_{race_name}_lap_chart.pdf"
-                with open(filename, "wb") as pdf_file:
-                    pdf_file.write(pdf_response.content)
-                print(f"Successfully downloaded: {os.path.abspath(filename)}")
-                return filename
-            else:
-                print(
-                    f"Failed to download PDF. Status code: {pdf_response.status_code}"
-                )
-                return None
-        else:
-            print("Could not find a link to the Lap Chart PDF.")
-
-            # As a fallback, print all PDF links found
-            print("\nAll PDF links found in the document:")
-            for link in links:
-                print(f"Text: {link.text.strip() if link.text else 'No text'}")
-                print(f"URL: {link['href']}\n")
-
+        lap_chart_link = find_lap_chart_link(html_content, url)
+        if lap_chart_link is None:
             return None
+
+        return download_pdf(lap_chart_link, year, race_name)
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         return None
 
 
+def _row_label(index):
+    return "GRID" if index == 0 else f"LAP {index}"
+
+
+def _align_rows(rows):
+    """Order table rows by label, with a bare label row for every missing lap."""
+    by_label = {}
+    for row in rows[1:]:
+        by_label.setdefault(row[0].strip(), row)
+    laps = [int(label[4:]) for label in by_label if label[4:].isdigit()]
+    count = max(laps, default=0) + 1
+    return [rows[0]] + [by_label.get(_row_label(i), [_row_label(i)]) for i in range(count)]
 
 
+def repair_suspect_laps(csv_content, pdf_file, engine):
+    """
+    Re-extract only the rows of a lap chart that fail validation.
+
+    The suspect rows, and any laps missing from the table, are requested
+    again and spliced into the table. The result is kept only if every
+    requested row came back and it has fewer suspect rows than before.
 
-def generate_csv_from_pdf(pdf_file, year, race_name):
+    Args:
+        csv_content (str): CSV text of the extracted table
+        pdf_file (str): Path to the PDF file the table came from
+        engine (ExtractionEngine): Engine reading the rows
+
+    Returns:
+        str: The repaired CSV text, or `csv_content` if nothing improved
     """
-    Generate a CSV file from a PDF file using Google Gemini API.
+    rows = [row for row in csv.reader(io.StringIO(csv_content)) if row]
+    if len(rows) < 2:
+        return csv_content
+    # Missing or repeated laps would shift every later row, so line the rows
+    # up by label first and only blame the laps themselves
+    aligned = _align_rows(rows)
+    suspects = validate_rows(aligned)
+    if not suspects:
+        return csv_content
+    # The rows standing in for missing laps hold no cars and must not end up
+    # in the archive, so they are always read again
+    for index, row in enumerate(aligned[1:]):
+        if len(row) < 2:
+            suspects.setdefault(index, []).append("missing row")
+    suspects = dict(sorted(suspects.items()))
+
+    print(f"Suspect rows in the table of {pdf_file}:")
+    for line in format_laps(suspects):
+        print(f"  {line}")
+    labels = [_row_label(index) for index in suspects]
+    try:
+        new_rows = engine.extract_laps(pdf_file, labels)
+    except StopPipeline:
+        raise
+    except Exception as e:
+        print(f"Could not re-extract the suspect rows of {pdf_file}: {e}")
+        return csv_content
+
+    # A partial answer would leave stand-in rows behind, keep the original
+    lost = [label for label in labels if len(new_rows.get(label, ())) < 2]
+    if lost:
+        print(f"Re-extraction of {pdf_file} did not return {', '.join(lost)}")
+        return csv_content
+    for index in suspects:
+        aligned[index + 1] = new_rows[_row_label(index)]
+    remaining = validate_rows(aligned)
+    if len(remaining) >= len(suspects):
+        print(f"Re-extracted rows did not improve the table of {pdf_file}")
+        return csv_content
+    print(f"Repaired {len(suspects) - len(remaining)} of {len(suspects)} suspect rows")
+    return "\n".join(",".join(row) for row in aligned)
+
+
+def generate_csv_from_pdf(pdf_file, year, race_name, engine=None):
+    """
+    Generate a CSV file from a PDF file.
 
     Args:
         pdf_file (str): Path to the PDF file
         year (int): The year of the race
         race_name (str): The name of the race
+        engine (ExtractionEngine): Engine reading the table, defaults to Gemini
 
     Returns:
         str: Path to the generated CSV file
     """
-    client = genai.Client(api_key=GEMINI_API_KEY)
+    if engine is None:
+        engine = get_engine("gemini")
 
     # Ensure the PDF file exists
     if not os.path.exists(pdf_file):
         print(f"Error: PDF file {pdf_file} not found.")
         return None
 
-    # Upload the file
-    files = [
-        client.files.upload(file=pdf_file),
-    ]
+    # Write rows as the engine produces them; the file only takes its final
+    # name once the whole table has arrived
+    csv_filename = f"{year}_{race_name}.csv"
+    part_filename = csv_filename + ".part"
+    rows = 0
+    try:
+        with open(part_filename, "w", newline="") as csv_file:
+            for line in engine.extract_rows(pdf_file):
+                if rows:
+                    csv_file.write("\n")
+                csv_file.write(line)
+                rows += 1
+    except StreamAborted as e:
+        print(f"Aborted extraction of {pdf_file}: {e}")
+        rows = 0
+    finally:
+        if not rows and os.path.exists(part_filename):
+            os.remove(part_filename)
+
+    if not rows:
+        print(f"Failed to extract the lap chart from {pdf_file}")
+        return None
 
-    model = "gemini-2.5-pro-exp-03-25"
-    contents = [
-        types.Content(
-            role="user",
-            parts=[
-                types.Part.from_uri(
-                    file_uri=files[0].uri,
-                    mime_type=files[0].mime_type,
-                ),
-                types.Part.from_text(
-                    text="""Output the data in a csv format
-
-                                     The user wants to extract the table data from the provided image into a CSV format.
-
-1.  **Identify the table:** The image contains a large table titled \"Race Lap Chart\".
-2.  **Determine columns:** The columns are labeled \"POS\", \"1\", \"2\", \"3\", ..., \"20\". The \"POS\" column contains lap numbers (\"GRID\", \"LAP 1\", \"LAP 2\", etc.).
-3.  **Determine rows:** Each row represents a lap (starting from \"GRID\" which is the starting grid, then \"LAP 1\" ).
-4.  **Extract data:** Go through each row, from \"GRID\" , and extract the values for each corresponding position (columns 1 to 20).
-5.  **Handle special cases:** Notice the empty cells and cells with boxes around them. The OCR seems to handle them correctly as numbers. The boxes likely indicate pit stops or position changes, but for CSV extraction, just the numbers are needed.
-6.  **Format as CSV:** Arrange the extracted data with commas separating the values in each row and a newline character separating the rows. The first row should be the header row (\"POS\", \"1\", \"2\", ..., \"20\").
-
-**Data Extraction Plan:**
-- Read the header row: POS, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20
-- Read GRID row:
-- Read LAP 1 row:
-- ... and so on for each lap
-
-- Ensure the number of columns matches the header for each row."""
-                ),
-            ],
-        ),
-    ]
+    with open(part_filename, newline="") as csv_file:
+        csv_content = csv_file.read()
+    repaired = repair_suspect_laps(csv_content, pdf_file, engine)
+    with telemetry.stage("csv_write") as record:
+        if repaired != csv_content:
+            with open(part_filename, "w", newline="") as csv_file:
+                csv_file.write(repaired)
+        os.replace(part_filename, csv_filename)
+        record["bytes"] = os.path.getsize(csv_filename)
+    print(f"Successfully generated CSV file: {os.path.abspath(csv_filename)}")
+    return csv_filename
 
-    generate_content_config = types.GenerateContentConfig(
-        response_mime_type="text/plain",
-    )
 
-    # Generate content
-    response = client.models.generate_content(
-        model=model,
-        contents=contents,
-        config=generate_content_config,
-    )
+def generate_csvs_from_pdfs(races, engine=None):
+    """
+    Generate CSV files for several races with one batched extraction.
 
-    # Extract CSV content from response
-    csv_content = response.text
+    Args:
+        races (list): (pdf_file, year, race_name) tuples
+        engine (ExtractionEngine): Engine reading the tables, defaults to Gemini
+
+    Returns:
+        list: Path to the generated CSV file of each race, None where it failed
+    """
+    if engine is None:
+        engine = get_engine("gemini")
+
+    pdf_files = [pdf_file for pdf_file, _, _ in races if os.path.exists(pdf_file)]
+    try:
+        tables = engine.extract_batch(pdf_files) if pdf_files else {}
+    except StopPipeline as e:
+        # Save the tables read before the run was stopped; repairing them
+        # would need more model calls
+        tables = getattr(e, "results", None) or {}
+        for pdf_file, year, race_name in races:
+            if tables.get(pdf_file):
+                save_csv(tables[pdf_file], pdf_file, year, race_name)
+        raise
+
+    csv_files = []
+    for pdf_file, year, race_name in races:
+        if pdf_file not in tables:
+            print(f"Error: PDF file {pdf_file} not found.")
+            csv_files.append(None)
+            continue
+        csv_content = tables[pdf_file]
+        if csv_content:
+            csv_content = repair_suspect_laps(csv_content, pdf_file, engine)
+        csv_files.append(save_csv(csv_content, pdf_file, year, race_name))
+    return csv_files
+
+
+def save_csv(csv_content, pdf_file, year, race_name):
+    """
+    Write an extracted lap chart to the archive.
+
+    Args:
+        csv_content (str): CSV text, None or empty if the extraction failed
+        pdf_file (str): Path to the PDF file the table came from
+        year (int): The year of the race
+        race_name (str): The name of the race
 
-    csv_content = csv_content.strip()
-    if csv_content.startswith("```csv"):
-        csv_content = csv_content[6:]  # Remove ```csv
-    if csv_content.endswith("```"):
-        csv_content = csv_content[:-3]  # Remove ```
-    csv_content = csv_content.strip()
+    Returns:
+        str: Path to the generated CSV file, None if there was nothing to save
+    """
+    if not csv_content:
+        print(f"Failed to extract the lap chart from {pdf_file}")
+        return None
 
     # Save to CSV file
     csv_filename = f"{year}_{race_name}.csv"
-    with open(csv_filename, "w", newline="") as csv_file:
-        csv_file.write(csv_content)
+    with telemetry.stage("csv_write", bytes=len(csv_content.encode("utf-8"))):
+        with open(csv_filename, "w", newline="") as csv_file:
+            csv_file.write(csv_content)
 
     print(f"Successfully generated CSV file: {os.path.abspath(csv_filename)}")
     return csv_filename
 
 
-def process_race_data(year, race_id):
+def process_race_data(year, race_id, engine=None):
     """
     Process race data by downloading the lap chart PDF and converting it to CSV.
 
     Args:
         year (int): The year of the race
         race_id (int): The ID of the race
+        engine (ExtractionEngine): Engine reading the table, defaults to Gemini
 
     Returns:
         str: Path to the generated CSV file, or None if processing failed
@@ -236,40 +401,306 @@ def process_race_data(year, race_id):
     
 
     # Get race name
-    race_name = utils.get_events(year)[race_id - 1]
+    race_name = seasons.event_name(year, race_id)
     race_name_formatted = race_name.replace(" ", "_").lower()
 
-    # Get FIA URLs
-    fia_url1, fia_url2 = race_url(year, race_id)
+    with telemetry.race(f"{year} {race_name}"):
+        # Find the lap chart on whichever FIA page variant the race uses
+        pdf_url = find_race_pdf_link(year, race_name)
+        pdf_file = download_pdf(pdf_url, year, race_name_formatted) if pdf_url else None
 
-    # Try to download the lap chart PDF from the first URL
-    pdf_file = download_lap_chart_pdf(fia_url1, year, race_name_formatted)
+        # If we have a PDF file, generate CSV from it
+        if pdf_file:
+            return generate_csv_from_pdf(pdf_file, year, race_name_formatted, engine)
+        else:
+            print(f"Failed to download lap chart PDF for {year} {race_name}")
+            return None
 
-    # If the first URL failed, try the second URL
-    if not pdf_file and fia_url2:
-        pdf_file = download_lap_chart_pdf(fia_url2, year, race_name_formatted)
 
-    # If we have a PDF file, generate CSV from it
-    if pdf_file:
-        return generate_csv_from_pdf(pdf_file, year, race_name_formatted)
-    else:
-        print(f"Failed to download lap chart PDF for {year} {race_name}")
+class RaceJob:
+    """State of one race as it moves through the extraction pipeline."""
+
+    def __init__(self, year, race_id):
+        self.year = year
+        self.race_id = race_id
+        self.race_name = seasons.event_name(year, race_id)
+        self.race_name_formatted = self.race_name.replace(" ", "_").lower()
+        self.pdf_url = None
+        self.pdf_file = None
+        self.csv_file = None
+
+    def __repr__(self):
+        return f"{self.year} {self.race_name}"
+
+
+def fetch_stage(job):
+    """Pipeline stage: find the Lap Chart PDF link on the FIA event page."""
+    with telemetry.race(job):
+        job.pdf_url = find_race_pdf_link(job.year, job.race_name)
+    if job.pdf_url is None:
+        print(f"Failed to find lap chart PDF for {job}")
         return None
+    return job
 
 
-if __name__ == "__main__":
-    
-    years = [2021,2025]
-    for year in years:
-        try:
-            total_races = len(utils.get_events(year))
-            for race in range(total_races):                
-                csv_file = process_race_data(year, race + 1)              
-                print("Waiting 15 seconds before next race...")
-                time.sleep(15) # RPM = 5, RPD = 50 for the model
-        except Exception as e:
-             print(f"An error occurred processing year {year}: {e}")             
-
-    print("\nFinished processing all specified races.")
+def download_stage(job):
+    """Pipeline stage: download the Lap Chart PDF."""
+    with telemetry.race(job):
+        job.pdf_file = download_pdf(job.pdf_url, job.year, job.race_name_formatted)
+    if job.pdf_file is None:
+        print(f"Failed to download lap chart PDF for {job}")
+        return None
+    return job
 
-    
+
+def generate_stage(job, engine=None):
+    """Pipeline stage: convert the Lap Chart PDF to CSV."""
+    with telemetry.race(job):
+        job.csv_file = generate_csv_from_pdf(
+            job.pdf_file, job.year, job.race_name_formatted, engine
+        )
+    if job.csv_file is None:
+        return None
+    return job
+
+
+def generate_batch_stage(jobs, engine=None):
+    """Pipeline stage: convert several Lap Chart PDFs to CSV in one request."""
+    csv_files = generate_csvs_from_pdfs(
+        [(job.pdf_file, job.year, job.race_name_formatted) for job in jobs], engine
+    )
+    finished = []
+    for job, csv_file in zip(jobs, csv_files):
+        job.csv_file = csv_file
+        if csv_file is not None:
+            finished.append(job)
+    return finished
+
+
+def run_extraction(
+    years,
+    rpm=5,
+    rpd=50,
+    incremental=False,
+    engine="gemini",
+    batch_size=None,
+    paged=False,
+    stream=False,
+    fast_model=None,
+    fast_rpm=10,
+    fast_rpd=500,
+    raster=None,
+    raster_dpi=RASTER_DPI,
+):
+    """
+    Extract the lap charts of every race in the given years.
+
+    Page fetches and PDF downloads for upcoming races run while the model is
+    working on the current one; only the model stage is rate limited.
+
+    Args:
+        years (list): Seasons to process
+        rpm (int): Model requests allowed per minute
+        rpd (int): Model requests allowed per day
+        incremental (bool): Only process races missing from the CSV archive
+            or failing its structural check
+        engine (str): Extraction engine name, see engines.get_engine
+        batch_size (int): Send up to this many lap charts per model request
+        paged (bool): Extract the pages of each lap chart concurrently
+        stream (bool): Stream model responses and stop at the first bad row
+        fast_model (str): Try this model first and only send tables it gets
+            wrong to the main model, see engines.TieredEngine
+        fast_rpm (int): Fast model requests allowed per minute
+        fast_rpd (int): Fast model requests allowed per day
+        raster (str): Upload grayscale images of the table instead of the
+            PDF, one of engines.RASTER_MODES
+        raster_dpi (int): Resolution of the table images
+
+    Returns:
+        list: Paths of the generated CSV files
+    """
+    if incremental:
+        races = [(year, race_id) for year, race_id, _, _ in build_work_plan(years)]
+    else:
+        races = [
+            (year, race_id)
+            for year in years
+            for race_id in range(1, len(seasons.get_events(year)) + 1)
+        ]
+    jobs = [RaceJob(year, race_id) for year, race_id in races]
+
+    # Every model request, including retries and pages of a paged
+    # extraction, goes through the scheduler's quota
+    scheduler = QuotaScheduler(rpm, rpd)
+    fast_scheduler = QuotaScheduler(fast_rpm, fast_rpd) if fast_model else None
+    extraction_engine = get_engine(
+        engine,
+        paged=paged,
+        stream=stream,
+        scheduler=scheduler,
+        fast_model=fast_model,
+        fast_scheduler=fast_scheduler,
+        raster=raster,
+        dpi=raster_dpi,
+    )
+    if batch_size:
+        generate = Stage(
+            "generate",
+            lambda jobs: generate_batch_stage(jobs, extraction_engine),
+            batch_size=batch_size,
+        )
+    else:
+        generate = Stage("generate", lambda job: generate_stage(job, extraction_engine))
+    stages = [
+        Stage("fetch", fetch_stage, workers=2),
+        Stage("download", download_stage, workers=2),
+        generate,
+    ]
+    finished = run_pipeline(jobs, stages)
+    telemetry.get_telemetry().flush()
+    for line in tier_report(telemetry.get_telemetry().totals):
+        print(line)
+    return [job.csv_file for job in finished]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract FIA lap charts to CSV.")
+    parser.add_argument("--years", type=int, nargs="+", default=[2021, 2025])
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only process races that are missing or invalid in the CSV archive",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="gemini",
+        help="table extraction engine; auto tries the local parser before Gemini",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        help="send several lap charts to the model in one request",
+    )
+    parser.add_argument(
+        "--paged",
+        action="store_true",
+        help="split lap charts by page and extract the pages concurrently",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="stream model responses, writing rows as they arrive",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print the incremental work plan and exit",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="check every lap of the CSV archive and print the suspect laps",
+    )
+    parser.add_argument(
+        "--build-store",
+        action="store_true",
+        help="pack the CSV archive into the memory-mapped lap chart store and exit",
+    )
+    parser.add_argument(
+        "--export",
+        metavar="PATH",
+        help="with --build-store, also write the store as .parquet or .arrow",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="write position metrics of every driver in every race as CSV and exit",
+    )
+    parser.add_argument(
+        "--render",
+        metavar="DIR",
+        help="draw the archived lap charts of --years as PNGs into DIR and exit",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="with --render, number of worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--fast-model",
+        nargs="?",
+        const=GEMINI_FAST_MODEL,
+        metavar="MODEL",
+        help="try a cheaper model first and only escalate tables failing validation",
+    )
+    parser.add_argument(
+        "--rasterize",
+        choices=RASTER_MODES,
+        help="upload grayscale images of the table, per page or as one composite, "
+        "instead of the PDF",
+    )
+    parser.add_argument(
+        "--raster-dpi",
+        type=int,
+        default=RASTER_DPI,
+        help="resolution of the table images uploaded with --rasterize",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=profiling.PROFILE_DIR,
+        metavar="DIR",
+        help="write cProfile stats and tracemalloc snapshots of every stage and race into DIR",
+    )
+    parser.add_argument(
+        "--stage-log",
+        metavar="PATH",
+        help="append the timing, bytes, retries and tokens of every stage as JSON lines",
+    )
+    parser.add_argument(
+        "--prometheus",
+        metavar="PATH",
+        help="write stage counters as a Prometheus textfile at the end of the run",
+    )
+    args = parser.parse_args()
+    if args.stage_log or args.prometheus:
+        telemetry.configure(args.stage_log, args.prometheus)
+    profiler = profiling.Profiler(args.profile) if args.profile else None
+    telemetry.set_profiler(profiler)
+
+    if args.render:
+        races = [(year, race) for year, race, _ in archive_files() if year in args.years]
+        render_races(races, args.render, args.workers, profile_dir=args.profile)
+    elif args.metrics:
+        race_metrics().to_csv(args.metrics, index=False)
+    elif args.build_store:
+        store = build_store()
+        if args.export and args.export.endswith(".parquet"):
+            export_parquet(store, args.export)
+        elif args.export:
+            export_arrow(store, args.export)
+    elif args.validate:
+        print_archive_report(validate_archive())
+    elif args.dry_run:
+        print_plan(build_work_plan(args.years))
+    else:
+        csv_files = run_extraction(
+            args.years,
+            incremental=args.incremental,
+            engine=args.engine,
+            batch_size=args.batch_size,
+            paged=args.paged,
+            stream=args.stream,
+            fast_model=args.fast_model,
+            raster=args.rasterize,
+            raster_dpi=args.raster_dpi,
+        )
+        print(f"\nFinished processing all specified races ({len(csv_files)} CSV files).")
+        if csv_files:
+            build_store()
+
+    if profiler is not None:
+        telemetry.set_profiler(None)
+        profiler.close()
+        print(profiling.summarize(args.profile))
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_DIR = os.environ.get("LAPCHART_HTTP_CACHE", ".http_cache")
+
+
+class CachedResponse:
+    """
+    Response returned by HttpCache.get.
+
+    Mirrors the parts of requests.Response used in this project. A response
+    revalidated with a 304 is returned as a 200 with `from_cache` set.
+    """
+
+    def __init__(self, url, status_code, content, headers, encoding=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.encoding = encoding
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+def _encoding(response):
+    # Only sniff the encoding of text responses; running charset detection
+    # over a PDF body is slow and meaningless
+    if response.encoding:
+        return response.encoding
+    if response.headers.get("Content-Type", "").startswith("text/"):
+        return response.apparent_encoding
+    return None
+
+
+class HttpCache:
+    """
+    Pooled HTTP session with an on-disk conditional-GET cache.
+
+    Responses carrying an ETag or Last-Modified header are stored on disk.
+    Later requests for the same URL send If-None-Match / If-Modified-Since,
+    so an unchanged resource costs a 304 instead of a full transfer.
+
+    Args:
+        cache_dir (str): Directory holding cached bodies and their validators
+        session (requests.Session): Session to use, a pooled one is created if None
+        pool_size (int): Keep-alive connections kept per host
+        timeout (float): Default request timeout in seconds
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, session=None, pool_size=10, timeout=30):
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".body"
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "encoding": _encoding(response),
+        }
+        # Write to temporary files first so concurrent readers never see a
+        # body that does not match its validators
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(body_path + suffix, "wb") as f:
+            f.write(response.content)
+        with open(meta_path + suffix, "w") as f:
+            json.dump(meta, f)
+        os.replace(body_path + suffix, body_path)
+        os.replace(meta_path + suffix, meta_path)
+
+    def get(self, url, timeout=None, headers=None):
+        """
+        GET a URL, revalidating any cached copy.
+
+        Args:
+            url (str): URL to fetch
+            timeout (float): Request timeout, defaults to the cache's timeout
+            headers (dict): Extra request headers
+
+        Returns:
+            CachedResponse: The response, served from disk on a 304
+        """
+        request_headers = dict(headers or {})
+        meta, body = self._load(url)
+        if meta is not None:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self.session.get(
+            url, headers=request_headers, timeout=timeout or self.timeout
+        )
+
+        if response.status_code == 304 and meta is not None:
+            cached_headers = {"Content-Type": meta.get("content_type") or ""}
+            if meta.get("etag"):
+                cached_headers["ETag"] = meta["etag"]
+            if meta.get("last_modified"):
+                cached_headers["Last-Modified"] = meta["last_modified"]
+            return CachedResponse(
+                url, 200, body, cached_headers, meta.get("encoding"), from_cache=True
+            )
+
+        if response.status_code == 200 and (
+            response.headers.get("ETag") or response.headers.get("Last-Modified")
+        ):
+            self._store(url, response)
+
+        return CachedResponse(
+            url,
+            response.status_code,
+            response.content,
+            response.headers,
+            _encoding(response),
+        )
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_http_cache():
+    """Return the HttpCache shared by the whole process."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HttpCache()
+        return _shared
+
+
+def get(url, timeout=None, headers=None):
+    """GET a URL through the shared HttpCache."""
+    return get_http_cache().get(url, timeout=timeout, headers=headers)
@@ -0,0 +1,122 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from archive import ARCHIVE_DIR, csv_path, race_slug
+from lap_store import to_int8
+from validate import EMPTY, read_chart
+
+# Number of parsed lap charts kept in memory
+CACHE_SIZE = int(os.environ.get("LAPCHART_CACHE_SIZE", "64"))
+
+
+class LapChart:
+    """
+    One race's lap chart as NumPy matrices.
+
+    Both matrices are read-only, since charts are shared through the cache.
+
+    Attributes:
+        year (int): The year of the race
+        race (str): Formatted race name, e.g. "bahrain_grand_prix"
+        cars (ndarray): int8 matrix of car numbers, row 0 is the GRID, row n
+            is LAP n and column p is position p + 1; EMPTY where no car is listed
+        positions (ndarray): int8 matrix indexed by car number and then row
+            like `cars`, holding the 1-based position of the car; EMPTY where
+            the car is not listed
+    """
+
+    def __init__(self, year, race, cars):
+        self.year = year
+        self.race = race
+        self.cars = cars
+        self.positions = invert(cars)
+        self.cars.setflags(write=False)
+        self.positions.setflags(write=False)
+
+    def __repr__(self):
+        return f"LapChart({self.year}, {self.race!r}, laps={self.laps})"
+
+    @property
+    def laps(self):
+        """Number of laps after the GRID."""
+        return max(self.cars.shape[0] - 1, 0)
+
+    @property
+    def drivers(self):
+        """Car numbers listed on the GRID, in grid order."""
+        if not len(self.cars):
+            return self.cars.reshape(-1)
+        return self.cars[0][self.cars[0] != EMPTY]
+
+    def position(self, car, lap):
+        """
+        Return where a car was on a lap, 0 being the GRID.
+
+        Returns:
+            int: 1-based position, None if the car is not listed on that lap
+        """
+        if not 0 <= car < self.positions.shape[0] or not 0 <= lap < self.positions.shape[1]:
+            return None
+        position = int(self.positions[car, lap])
+        return None if position == EMPTY else position
+
+
+def invert(cars):
+    """
+    Turn a car number matrix into a car × rows position matrix.
+
+    Args:
+        cars (ndarray): Car numbers, one row per GRID / LAP row, EMPTY where
+            no car is listed
+
+    Returns:
+        ndarray: int8 matrix where [car, row] is the 1-based position of the
+            car in that row, EMPTY where it is not listed
+    """
+    rows, columns = cars.shape
+    highest = int(cars.max(initial=EMPTY))
+    positions = np.full((highest + 1, rows), EMPTY, np.int8)
+    row, column = np.nonzero(cars != EMPTY)
+    positions[cars[row, column], row] = column + 1
+    return positions
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _load(path, mtime_ns, size, year, race):
+    # The modification time and size are part of the key so an updated CSV
+    # is parsed again; the stale entry ages out of the cache
+    cars, _, _ = read_chart(path)
+    return LapChart(year, race, to_int8(cars, path))
+
+
+def load_lap_chart(year, race, archive_dir=ARCHIVE_DIR):
+    """
+    Load the lap chart of a race from the CSV archive.
+
+    Charts are kept in a bounded LRU cache and only parsed again when the
+    CSV file changes.
+
+    Args:
+        year (int): The year of the race
+        race (str): Race name as formatted by process_race_data, e.g.
+            "bahrain_grand_prix"; event names such as "Bahrain Grand Prix"
+            are formatted the same way
+        archive_dir (str): Directory holding the lap chart CSVs
+
+    Returns:
+        LapChart: The parsed chart
+
+    Raises:
+        FileNotFoundError: If the archive has no CSV for the race
+        ValueError: If a car number does not fit the int8 matrix
+    """
+    path = csv_path(year, race, archive_dir)
+    stat = os.stat(path)
+    return _load(path, stat.st_mtime_ns, stat.st_size, year, race_slug(race))
+
+
+def clear_cache():
+    """Drop every cached lap chart."""
+    _load.cache_clear()
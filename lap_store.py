@@ -0,0 +1,248 @@
+import glob
+import json
+import os
+import re
+
+import numpy as np
+
+from archive import ARCHIVE_DIR
+from validate import EMPTY, read_chart
+
+STORE_PATH = os.environ.get("LAPCHART_STORE", "lap_charts.bin")
+
+_MAGIC = b"LAPSTOR1"
+
+# Array sections start on this boundary so they can be mapped directly
+_ALIGN = 64
+
+_CSV_NAME = re.compile(r"^(\d{4})_(.+)\.csv$")
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def archive_files(archive_dir=ARCHIVE_DIR):
+    """
+    List the lap chart CSVs of the archive.
+
+    Returns:
+        list: (year, race, path) tuples sorted by year and race, where race
+            is the formatted name used in the file name, e.g. "bahrain_grand_prix"
+    """
+    files = []
+    for path in glob.glob(os.path.join(archive_dir, "*.csv")):
+        match = _CSV_NAME.match(os.path.basename(path))
+        if match:
+            files.append((int(match.group(1)), match.group(2), path))
+    return sorted(files)
+
+
+class LapStore:
+    """
+    All lap charts of the archive in one memory-mapped columnar file.
+
+    The file holds a JSON header with the (year, race, laps) metadata of
+    every race, then three arrays: the row offset of each race, the lap
+    number of each row (0 is the GRID) and an int8 matrix of car numbers
+    with one row per GRID / LAP row and one column per position. Cells
+    without a car hold EMPTY. Opening the store maps the arrays; nothing
+    is parsed or copied until it is read.
+
+    Args:
+        path (str): Path of the store file
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a lap chart store")
+            header_size = int.from_bytes(f.read(4), "little")
+            self.header = json.loads(f.read(header_size))
+
+        self.races = self.header["races"]
+        self.positions = self.header["positions"]
+        rows = self.header["rows"]
+        sections = self.header["sections"]
+        self.offsets = np.memmap(
+            path, np.int64, "r", sections["offsets"], (len(self.races) + 1,)
+        )
+        self.laps = np.memmap(path, np.int16, "r", sections["laps"], (rows,))
+        self.cars = np.memmap(path, np.int8, "r", sections["cars"], (rows, self.positions))
+        self.index = {(race["year"], race["race"]): i for i, race in enumerate(self.races)}
+
+    def __len__(self):
+        return len(self.races)
+
+    def close(self):
+        """
+        Unmap the store file.
+
+        Windows refuses to replace a file that is still mapped, so this has
+        to happen before the file is rebuilt. Arrays taken from the store
+        must not be used afterwards.
+        """
+        arrays = (self.offsets, self.laps, self.cars)
+        self.offsets = self.laps = self.cars = None
+        for array in arrays:
+            if array is not None and array._mmap is not None:
+                array._mmap.close()
+
+    def chart(self, year, race):
+        """
+        Return the car number matrix of one race, a view into the store.
+
+        Args:
+            year (int): The year of the race
+            race (str): Formatted race name, e.g. "bahrain_grand_prix"
+
+        Returns:
+            ndarray: int8 matrix, row 0 is the GRID and row n is LAP n
+        """
+        i = self.index[(year, race)]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.cars[start:end, : self.races[i]["positions"]]
+
+
+def open_store(path=STORE_PATH):
+    """Open a store written by build_store, None if there is none yet."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return LapStore(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable lap chart store {path}: {e}")
+        return None
+
+
+def to_int8(cars, path):
+    """Narrow a car number matrix to int8, raising ValueError if a number does not fit."""
+    if cars.size and (cars.max() > np.iinfo(np.int8).max or cars.min() < EMPTY):
+        raise ValueError(f"car numbers out of range in {path}")
+    return cars.astype(np.int8)
+
+
+def _write_store(path, races, laps, cars, positions):
+    offsets = np.zeros(len(races) + 1, np.int64)
+    offsets[1:] = np.cumsum([len(race_laps) for race_laps in laps])
+    laps = np.concatenate(laps) if laps else np.zeros(0, np.int16)
+    matrix = np.full((int(offsets[-1]), positions), EMPTY, np.int8)
+    for start, race_cars in zip(offsets, cars):
+        matrix[start : start + race_cars.shape[0], : race_cars.shape[1]] = race_cars
+
+    # The header records where each array starts, so size it until it fits
+    header = {"version": 1, "positions": positions, "rows": len(laps), "races": races}
+    sections = {"offsets": 0, "laps": 0, "cars": 0}
+    while True:
+        header["sections"] = sections
+        encoded = json.dumps(header, sort_keys=True).encode("utf-8")
+        start = _aligned(len(_MAGIC) + 4 + len(encoded))
+        wanted = {"offsets": start}
+        wanted["laps"] = _aligned(wanted["offsets"] + offsets.nbytes)
+        wanted["cars"] = _aligned(wanted["laps"] + laps.nbytes)
+        if wanted == sections:
+            break
+        sections = wanted
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(len(encoded).to_bytes(4, "little"))
+        f.write(encoded)
+        for name, array in (("offsets", offsets), ("laps", laps), ("cars", matrix)):
+            f.write(b"\0" * (sections[name] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+
+def build_store(archive_dir=ARCHIVE_DIR, path=STORE_PATH):
+    """
+    Pack every lap chart CSV of the archive into the store file.
+
+    Only CSVs that are new or changed since the last build (by size and
+    modification time) are parsed; the other races are copied over from
+    the existing store.
+
+    Args:
+        archive_dir (str): Directory holding the lap chart CSVs
+        path (str): Path of the store file
+
+    Returns:
+        LapStore: The rebuilt store
+    """
+    previous = open_store(path)
+    races, laps, cars = [], [], []
+    parsed = 0
+    for year, race, csv_file in archive_files(archive_dir):
+        stat = os.stat(csv_file)
+        source = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        i = previous.index.get((year, race)) if previous is not None else None
+        if i is not None and previous.races[i]["source"] == source:
+            start, end = previous.offsets[i], previous.offsets[i + 1]
+            race_laps = np.array(previous.laps[start:end])
+            race_cars = np.array(previous.chart(year, race))
+        else:
+            try:
+                race_cars, race_laps, _ = read_chart(csv_file)
+                race_cars = to_int8(race_cars, csv_file)
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                print(f"Skipping {csv_file}: {e}")
+                continue
+            race_laps = race_laps.astype(np.int16)
+            parsed += 1
+        races.append(
+            {
+                "year": year,
+                "race": race,
+                "laps": int(race_laps.max(initial=0)),
+                "positions": race_cars.shape[1],
+                "source": source,
+            }
+        )
+        laps.append(race_laps)
+        cars.append(race_cars)
+
+    # Everything kept was copied out above; release the old file before replacing it
+    if previous is not None:
+        previous.close()
+    positions = max((race["positions"] for race in races), default=0)
+    _write_store(path, races, laps, cars, positions)
+    print(f"Lap chart store {path}: {len(races)} races, {parsed} parsed from CSV")
+    return LapStore(path)
+
+
+def to_arrow(store):
+    """
+    Convert a store to an Arrow table with one row per GRID / LAP row.
+
+    Columns are year, race, lap and one int8 column per position ("1",
+    "2", ...), null where no car is listed.
+    """
+    import pyarrow as pa
+
+    counts = np.diff(store.offsets)
+    years = np.repeat([race["year"] for race in store.races], counts).astype(np.int16)
+    race_ids = np.repeat(np.arange(len(store.races), dtype=np.int32), counts)
+    races = pa.DictionaryArray.from_arrays(
+        pa.array(race_ids), pa.array([race["race"] for race in store.races])
+    )
+    columns = {"year": pa.array(years), "race": races, "lap": pa.array(store.laps)}
+    for position in range(store.positions):
+        column = store.cars[:, position]
+        columns[str(position + 1)] = pa.array(column, mask=column == EMPTY)
+    return pa.table(columns)
+
+
+def export_parquet(store, path):
+    """Write a store as a Parquet file, see to_arrow."""
+    import pyarrow.parquet as pq
+
+    pq.write_table(to_arrow(store), path)
+
+
+def export_arrow(store, path):
+    """Write a store as an Arrow IPC (Feather) file, see to_arrow."""
+    import pyarrow.feather as feather
+
+    feather.write_feather(to_arrow(store), path)
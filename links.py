@@ -0,0 +1,135 @@
+import re
+from html.parser import HTMLParser
+
+PDF_HREF = re.compile(r"\.pdf$")
+
+# How a title was paired with its link, in the order the lookups are tried
+LINK_TEXT = 1  # text of the <a> itself
+TEXT_PARENT = 2  # text node whose parent element contains the link
+TITLE_DIV = 3  # <div class="title"> whose parent contains the link
+
+_VOID_TAGS = set(
+    "area base br col embed hr img input link meta param source track wbr".split()
+)
+
+
+class _Element:
+    __slots__ = ("tag", "is_title", "href", "text", "own_text", "pdf_hrefs", "titles", "seq")
+
+    def __init__(self, tag, is_title, href, seq):
+        self.tag = tag
+        self.is_title = is_title
+        self.href = href
+        self.text = []
+        self.own_text = []
+        self.pdf_hrefs = []
+        self.titles = []
+        self.seq = seq
+
+
+class _LinkIndexer(HTMLParser):
+    """Event-based parser collecting (title, pdf href) pairs in one pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = [_Element(None, False, None, 0)]
+        self.entries = []
+        self.seq = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_TAGS:
+            return
+        self.seq += 1
+        attrs = dict(attrs)
+        href = attrs.get("href") if tag == "a" else None
+        if href is not None and not PDF_HREF.search(href):
+            href = None
+        is_title = tag == "div" and "title" in (attrs.get("class") or "").split()
+        self.stack.append(_Element(tag, is_title, href, self.seq))
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_data(self, data):
+        top = self.stack[-1]
+        top.text.append(data)
+        top.own_text.append(data)
+
+    def handle_endtag(self, tag):
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                while len(self.stack) > depth:
+                    self._pop()
+                return
+
+    def close(self):
+        super().close()
+        while len(self.stack) > 1:
+            self._pop()
+        # Text and title divs at the top level pair with links anywhere
+        self._pair(self.stack[0])
+        self.entries.sort(key=lambda entry: (entry[0], entry[1]))
+
+    def _pop(self):
+        element = self.stack.pop()
+        parent = self.stack[-1]
+        text = "".join(element.text)
+
+        if element.href is not None:
+            self.entries.append((element.seq, LINK_TEXT, text, element.href))
+        self._pair(element)
+        if element.is_title:
+            parent.titles.append((element.seq, text))
+
+        parent.text.append(text)
+        if element.href is not None:
+            parent.pdf_hrefs.append(element.href)
+        parent.pdf_hrefs.extend(element.pdf_hrefs)
+
+    def _pair(self, element):
+        # Pair the element's own text and its title-div children with the
+        # first PDF link inside it
+        if element.pdf_hrefs:
+            own_text = "".join(element.own_text)
+            if own_text.strip():
+                self.entries.append((element.seq, TEXT_PARENT, own_text, element.pdf_hrefs[0]))
+            for seq, title in element.titles:
+                self.entries.append((seq, TITLE_DIV, title, element.pdf_hrefs[0]))
+
+
+def index_pdf_links(html_content):
+    """
+    Collect every (title, pdf href) pair of a page in a single parse.
+
+    Args:
+        html_content (str): The HTML of the page
+
+    Returns:
+        list: (kind, title, href) tuples in document order, where kind is
+            LINK_TEXT, TEXT_PARENT or TITLE_DIV
+    """
+    indexer = _LinkIndexer()
+    indexer.feed(html_content)
+    indexer.close()
+    return [(kind, title, href) for _, kind, title, href in indexer.entries]
+
+
+def find_document_link(index, name):
+    """
+    Look up the link of a named document in an index from index_pdf_links.
+
+    Links whose own text matches win over text next to a link, which win over
+    a matching title div; within each kind the first match in the page is used.
+
+    Args:
+        index (list): Result of index_pdf_links
+        name (str): Text the document title has to contain, e.g. "Lap Chart"
+
+    Returns:
+        str: The href as written in the page, None if there is no match
+    """
+    for wanted in (LINK_TEXT, TEXT_PARENT, TITLE_DIV):
+        for kind, title, href in index:
+            if kind == wanted and name in title:
+                return href
+    return None
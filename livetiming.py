@@ -0,0 +1,131 @@
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_cache
+
+CACHE_DIR = os.environ.get("LAPCHART_LIVETIMING_CACHE", ".livetiming_cache")
+
+INDEX_URL = "https://livetiming.formula1.com/static/{year}/Index.json"
+
+# Seconds a season index fetched while the season was running stays fresh
+TTL = int(os.environ.get("LAPCHART_LIVETIMING_TTL", str(6 * 3600)))
+
+
+class IndexCache:
+    """
+    Season indexes of the F1 live timing API, persisted on disk.
+
+    An index fetched after its season ended never expires, since past
+    seasons do not change; one fetched during the season is refreshed after
+    `ttl` seconds. When a refresh fails the stale copy is used.
+
+    Args:
+        cache_dir (str): Directory holding one JSON file per season
+        ttl (float): Freshness of indexes of a running season, in seconds
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, year):
+        return os.path.join(self.cache_dir, f"{year}.json")
+
+    def _load(self, year):
+        try:
+            with open(self._path(year), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, year, data):
+        entry = {"year": year, "fetched_at": time.time(), "data": data}
+        tmp_path = f"{self._path(year)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(year))
+
+    def is_fresh(self, entry):
+        """Whether a cached entry can be used without asking the API."""
+        fetched = datetime.datetime.fromtimestamp(entry["fetched_at"])
+        return fetched.year > entry["year"] or time.time() - entry["fetched_at"] < self.ttl
+
+    def cached(self, year):
+        """Return the cached index of a season if it is fresh, None otherwise."""
+        entry = self._load(year)
+        if entry is not None and self.is_fresh(entry):
+            return entry["data"]
+        return None
+
+    def fetch(self, year):
+        """
+        Download the index of a season and cache it.
+
+        Returns:
+            dict: The parsed index, None if it could not be fetched
+        """
+        response = http_cache.get(INDEX_URL.format(year=year), timeout=5)
+        if response.status_code != 200:
+            print("Failed to get data. Status code:", response.status_code)
+            return None
+        try:
+            data = json.loads(response.content.decode("utf-8-sig"))
+        except json.JSONDecodeError as e:
+            print("Failed to parse JSON data:", e)
+            return None
+        self._store(year, data)
+        return data
+
+    def get(self, year):
+        """
+        Return the index of a season, from disk when the cached copy is fresh.
+
+        Returns:
+            dict: The parsed index, None if it is neither cached nor fetchable
+        """
+        data = self.cached(year)
+        if data is not None:
+            return data
+        try:
+            data = self.fetch(year)
+        except Exception as e:
+            print(f"Could not fetch the {year} live timing index: {e}")
+            data = None
+        if data is None:
+            # A stale copy beats nothing
+            entry = self._load(year)
+            if entry is not None:
+                return entry["data"]
+        return data
+
+    def get_many(self, years, workers=8):
+        """
+        Return the indexes of several seasons, fetching the stale ones concurrently.
+
+        Returns:
+            dict: Year to parsed index (None where it could not be loaded)
+        """
+        indexes = {year: self.cached(year) for year in years}
+        missing = [year for year, data in indexes.items() if data is None]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as executor:
+                indexes.update(zip(missing, executor.map(self.get, missing)))
+        return indexes
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_index_cache():
+    """Return the IndexCache shared by the whole process."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = IndexCache()
+        return _shared
@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import threading
+
+import requests
+
+import http_cache
+import telemetry
+
+STORE_DIR = os.environ.get("LAPCHART_PDF_STORE", ".pdf_store")
+
+CHUNK_SIZE = 64 * 1024
+
+
+class PdfStore:
+    """
+    Content-addressed store for lap-chart PDFs.
+
+    PDFs are kept under `objects/` named by their SHA-256 digest. A manifest
+    maps each (year, race) to the digest, the source URL and the validators
+    the server sent, so a HEAD request is enough to tell whether the stored
+    copy is still current.
+
+    Downloads are streamed to a partial file in chunks and moved into place
+    once complete. A dropped connection keeps the partial file and the next
+    attempt resumes it with an HTTP Range request.
+
+    Args:
+        root (str): Directory of the store
+        session (requests.Session): Session used for HEAD and GET requests,
+            defaults to the shared pooled session
+        chunk_size (int): Bytes read and written at a time while downloading
+        retries (int): Download attempts before giving up on a PDF
+    """
+
+    def __init__(self, root=STORE_DIR, session=None, chunk_size=CHUNK_SIZE, retries=3):
+        self.root = root
+        self.session = session or http_cache.get_http_cache().session
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "partial"), exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def key(year, race_name):
+        return f"{year}/{race_name}"
+
+    def object_path(self, digest):
+        return os.path.join(self.root, "objects", f"{digest}.pdf")
+
+    def lookup(self, year, race_name):
+        """
+        Return the manifest entry of a race if its PDF is in the store.
+
+        Args:
+            year (int): The year of the race
+            race_name (str): The name of the race
+
+        Returns:
+            dict: Manifest entry, None if the race has no stored PDF
+        """
+        with self.lock:
+            entry = self.manifest.get(self.key(year, race_name))
+        if entry and os.path.exists(self.object_path(entry["digest"])):
+            return entry
+        return None
+
+    def is_current(self, entry, url):
+        """
+        Check with a HEAD request whether a stored PDF matches the server copy.
+
+        The copy is current when it came from the same URL and the server
+        reports the same Content-Length and Last-Modified (or ETag). A HEAD
+        request that fails, or a malformed Content-Length, counts as not
+        current, so the PDF is downloaded.
+        """
+        if entry["url"] != url:
+            return False
+
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=30)
+        except requests.RequestException as e:
+            print(f"Could not check the stored copy of {url}: {e}")
+            return False
+        if response.status_code != 200:
+            return False
+
+        length = response.headers.get("Content-Length")
+        last_modified = response.headers.get("Last-Modified")
+        etag = response.headers.get("ETag")
+        if length is None and last_modified is None and etag is None:
+            # Nothing to compare against, assume the file changed
+            return False
+        if length is not None and (not length.strip().isdigit() or int(length) != entry["size"]):
+            return False
+        if last_modified is not None and last_modified != entry.get("last_modified"):
+            return False
+        if etag is not None and entry.get("etag") and etag != entry["etag"]:
+            return False
+        return True
+
+    def _partial_paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.root, "partial", key)
+        return base + ".part", base + ".json"
+
+    def _stream_to_partial(self, url):
+        """
+        Stream the PDF into its partial file, resuming an earlier attempt.
+
+        Returns:
+            dict: Response validators once the file is complete, None if the
+                server refused the download
+        """
+        part_path, meta_path = self._partial_paths(url)
+        headers = {}
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validators = {}
+        if offset:
+            try:
+                with open(meta_path) as f:
+                    validators = json.load(f)
+            except (OSError, ValueError):
+                validators = {}
+            headers["Range"] = f"bytes={offset}-"
+            # Only resume if the file has not changed since the partial download
+            validator = validators.get("etag") or validators.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+
+        with self.session.get(url, headers=headers, stream=True, timeout=60) as response:
+            if response.status_code == 416 and offset:
+                # The partial file is unusable, start over on the next attempt
+                os.remove(part_path)
+                raise IOError("requested range not satisfiable")
+            if response.status_code == 206 and offset:
+                mode = "ab"
+                print(f"Resuming download at byte {offset}")
+            elif response.status_code == 200:
+                mode = "wb"
+                offset = 0
+            else:
+                print(f"Failed to download PDF. Status code: {response.status_code}")
+                return None
+
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            with open(meta_path, "w") as f:
+                json.dump(validators, f)
+
+            # Content-Length counts encoded bytes, only usable without Content-Encoding
+            length = response.headers.get("Content-Length")
+            expected = None
+            encoded = response.headers.get("Content-Encoding")
+            if length and length.strip().isdigit() and not encoded:
+                expected = offset + int(length)
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    f.write(chunk)
+
+        size = os.path.getsize(part_path)
+        if expected is not None and size != expected:
+            raise IOError(f"incomplete download, {size} of {expected} bytes")
+        return validators
+
+    def _download(self, url):
+        part_path, meta_path = self._partial_paths(url)
+        validators = None
+        for attempt in range(1, self.retries + 1):
+            try:
+                validators = self._stream_to_partial(url)
+                break
+            except (requests.RequestException, IOError) as e:
+                # Keep the partial file, the next attempt resumes from it
+                print(f"Download attempt {attempt} of {url} failed: {e}")
+                if attempt < self.retries:
+                    telemetry.count_retry()
+        if validators is None:
+            return None, None
+
+        digest = hashlib.sha256()
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        size = os.path.getsize(part_path)
+
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            os.remove(part_path)
+        else:
+            os.replace(part_path, path)
+        os.remove(meta_path)
+
+        entry = {
+            "digest": digest,
+            "url": url,
+            "size": size,
+            "last_modified": validators["last_modified"],
+            "etag": validators["etag"],
+        }
+        return path, entry
+
+    def fetch(self, url, year, race_name):
+        """
+        Return a local path to the PDF at `url`, downloading only if needed.
+
+        Args:
+            url (str): Absolute URL of the Lap Chart PDF
+            year (int): The year of the race
+            race_name (str): The name of the race
+
+        Returns:
+            str: Path of the PDF in the store, None if the download failed
+                and no copy of the race is stored
+        """
+        entry = self.lookup(year, race_name)
+        if entry is not None and self.is_current(entry, url):
+            path = self.object_path(entry["digest"])
+            print(f"Stored PDF is current: {os.path.abspath(path)}")
+            telemetry.annotate(cached=True)
+            return path
+
+        path, new_entry = self._download(url)
+        if path is None:
+            if entry is None:
+                return None
+            # An older copy beats dropping the race
+            path = self.object_path(entry["digest"])
+            print(f"Download failed, using the stored PDF: {os.path.abspath(path)}")
+            telemetry.annotate(cached=True)
+            return path
+        entry = new_entry
+
+        with self.lock:
+            self.manifest[self.key(year, race_name)] = entry
+            self._save_manifest()
+        print(f"Successfully downloaded: {os.path.abspath(path)}")
+        telemetry.annotate(bytes=entry["size"], cached=False)
+        return path
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_pdf_store():
+    """Return the PdfStore shared by the whole process."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PdfStore()
+        return _shared
@@ -0,0 +1,208 @@
+import queue
+import threading
+import time
+
+# Marks the end of the work on a queue, one per worker reading from it
+_DONE = object()
+
+# Refills leave rounding errors, a bucket this close to a token has one
+_EPSILON = 1e-9
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+
+    The bucket holds up to `capacity` tokens and refills at `rate` tokens per
+    `per` seconds. `acquire` blocks until a token is available.
+
+    Args:
+        rate (int): Number of tokens added per period
+        per (float): Length of the refill period in seconds
+        capacity (int): Maximum number of tokens held, defaults to `rate`
+        clock (callable): Monotonic time source
+        sleep (callable): Sleep function used while waiting for tokens
+    """
+
+    def __init__(self, rate, per, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.per = per
+        self.capacity = capacity if capacity is not None else rate
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(self.capacity)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate / self.per)
+
+    def wait_time(self):
+        """Return how many seconds until a token is available."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1 - _EPSILON:
+                return 0.0
+            return (1 - self.tokens) * self.per / self.rate
+
+    def try_acquire(self):
+        """Take a token if one is available, without blocking."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1 - _EPSILON:
+                self.tokens = max(0.0, self.tokens - 1)
+                return True
+            return False
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        while not self.try_acquire():
+            self.sleep(self.wait_time())
+
+
+class StopPipeline(Exception):
+    """Raised by a stage to stop the whole run; queued jobs are dropped."""
+
+
+class Stage:
+    """
+    One step of the pipeline.
+
+    Args:
+        name (str): Name used in log messages
+        func (callable): Called with a job, returns the job for the next stage
+            or None to drop it. With `batch_size` set it is called with a list
+            of jobs and returns the list of jobs to pass on.
+        workers (int): Number of threads running this stage
+        batch_size (int): Group up to this many jobs into one call
+        batch_timeout (float): Seconds to wait for a batch to fill up before
+            running it with the jobs that have arrived
+    """
+
+    def __init__(self, name, func, workers=1, batch_size=None, batch_timeout=60):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+
+
+def _next_batch(stage, inbox):
+    """Collect the next batch of jobs, returns (jobs, done)."""
+    job = inbox.get()
+    if job is _DONE:
+        return [], True
+    jobs = [job]
+    deadline = time.monotonic() + stage.batch_timeout
+    while len(jobs) < stage.batch_size:
+        try:
+            job = inbox.get(timeout=max(0, deadline - time.monotonic()))
+        except queue.Empty:
+            break
+        if job is _DONE:
+            return jobs, True
+        jobs.append(job)
+    return jobs, False
+
+
+def _run_stage(stage, inbox, outbox, downstream, remaining, lock, stop):
+    done = False
+    while not done:
+        if stage.batch_size:
+            jobs, done = _next_batch(stage, inbox)
+            if not jobs:
+                continue
+            work = jobs
+        else:
+            work = inbox.get()
+            if work is _DONE:
+                break
+        if stop.is_set():
+            # Keep draining the queue so upstream stages can finish
+            continue
+        try:
+            result = stage.func(work)
+        except StopPipeline as e:
+            print(f"Stopping the pipeline in stage {stage.name}: {e}")
+            stop.set()
+            result = None
+        except Exception as e:
+            print(f"An error occurred in stage {stage.name} for {work}: {e}")
+            result = None
+        if stage.batch_size:
+            for job in result or []:
+                outbox.put(job)
+        elif result is not None:
+            outbox.put(result)
+
+    # The last worker of a stage closes the next queue, once per downstream worker
+    with lock:
+        remaining[0] -= 1
+        last = remaining[0] == 0
+    if last:
+        for _ in range(downstream):
+            outbox.put(_DONE)
+
+
+def run_pipeline(jobs, stages, queue_size=4):
+    """
+    Run jobs through a sequence of stages connected by bounded queues.
+
+    Every stage runs in its own thread pool, so a slow stage (e.g. the model
+    call) does not stop earlier stages from preparing upcoming jobs. Bounded
+    queues keep earlier stages from running too far ahead. A stage raising
+    StopPipeline ends the run; jobs not yet processed are dropped.
+
+    Args:
+        jobs (iterable): Jobs fed into the first stage
+        stages (list): List of Stage objects
+        queue_size (int): Maximum number of jobs waiting between two stages
+
+    Returns:
+        list: Jobs that made it through every stage, in completion order
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    results = queue.Queue()
+    outboxes = queues[1:] + [results]
+    downstreams = [stage.workers for stage in stages[1:]] + [1]
+    stop = threading.Event()
+    threads = []
+
+    for stage, inbox, outbox, downstream in zip(stages, queues, outboxes, downstreams):
+        remaining = [stage.workers]
+        lock = threading.Lock()
+        for i in range(stage.workers):
+            thread = threading.Thread(
+                target=_run_stage,
+                args=(stage, inbox, outbox, downstream, remaining, lock, stop),
+                name=f"{stage.name}-{i}",
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+
+    def feed():
+        for job in jobs:
+            if stop.is_set():
+                break
+            queues[0].put(job)
+        for _ in range(stages[0].workers):
+            queues[0].put(_DONE)
+
+    feeder = threading.Thread(target=feed, name="feeder", daemon=True)
+    feeder.start()
+
+    finished = []
+    while True:
+        job = results.get()
+        if job is _DONE:
+            break
+        finished.append(job)
+
+    feeder.join()
+    for thread in threads:
+        thread.join()
+    return finished
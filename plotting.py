@@ -0,0 +1,53 @@
+import os
+
+
+def get_custom_font(url, font_filename=None):
+    # matplotlib and wget are only imported when a plot is drawn
+    import wget
+    from matplotlib.font_manager import FontProperties
+
+    # Extract filename from URL if not provided
+    if font_filename is None:
+        font_filename = os.path.basename(url)
+
+    # Check if the font file already exists in the current directory
+    if os.path.exists(font_filename):
+        print(f"Using existing font file: {font_filename}")
+    else:
+        print(f"Downloading font file: {font_filename}")
+        wget.download(url)
+        print()  # Add a newline after wget's progress bar
+
+    return FontProperties(fname=font_filename)
+
+
+def setup_plot_style(background="lightblue", text_color="black"):
+    """Configure matplotlib styling for the plot."""
+    import matplotlib as mpl
+
+    mpl.rcParams["xtick.color"] = text_color
+    mpl.rcParams["ytick.color"] = text_color
+    mpl.rcParams["xtick.labelsize"] = 32
+    mpl.rcParams["ytick.labelsize"] = 32
+    mpl.rcParams["axes.labelcolor"] = text_color
+    mpl.rcParams["figure.facecolor"] = background
+    mpl.rcParams["axes.facecolor"] = background
+
+    # Configure spines
+    mpl.rcParams["axes.spines.top"] = False
+    mpl.rcParams["axes.spines.right"] = False
+    mpl.rcParams["axes.spines.left"] = True
+    mpl.rcParams["axes.spines.bottom"] = True
+    mpl.rcParams["axes.edgecolor"] = text_color
+
+    # Configure legend
+    mpl.rcParams["legend.frameon"] = True
+    mpl.rcParams["legend.facecolor"] = background
+    mpl.rcParams["legend.edgecolor"] = text_color
+    mpl.rcParams["legend.fancybox"] = True
+    mpl.rcParams["legend.fontsize"] = 32
+
+    # Configure other text elements
+    mpl.rcParams["axes.titlesize"] = 32
+    mpl.rcParams["axes.labelsize"] = 32
+    mpl.rcParams["ytick.major.size"] = 0
@@ -0,0 +1,159 @@
+import cProfile
+import glob
+import io
+import os
+import pstats
+import re
+import threading
+import tracemalloc
+
+PROFILE_DIR = os.environ.get("LAPCHART_PROFILE_DIR", "profile")
+
+# Stack frames kept per traced allocation
+FRAMES = 10
+
+
+# Allocations made by the profiling itself
+_IGNORED = [
+    tracemalloc.Filter(False, f"*/{module}.py") for module in ("cProfile", "pstats", "tracemalloc")
+]
+
+
+def _slug(label):
+    return re.sub(r"[^0-9A-Za-z]+", "_", label or "run").strip("_").lower()
+
+
+class Profiler:
+    """
+    cProfile and tracemalloc around every telemetry stage.
+
+    Each outermost stage running in a thread gets its own cProfile profile;
+    stages nested inside it (e.g. page fetches inside link resolution) are
+    part of the outer one. When a stage ends its profile is merged into
+    `<out_dir>/<race>/<stage>.prof` and a tracemalloc snapshot is written
+    next to it as `<stage>.snapshot`. Files are written as stages finish, so
+    worker processes need no shutdown step.
+
+    From Python 3.12 only one cProfile profile can be active in a process;
+    a stage starting while another thread is profiled is timed but not
+    profiled.
+
+    Args:
+        out_dir (str): Directory receiving the stats and snapshots
+        frames (int): Stack frames kept per traced allocation
+    """
+
+    def __init__(self, out_dir=PROFILE_DIR, frames=FRAMES):
+        self.out_dir = out_dir
+        self.local = threading.local()
+        self.stats = {}
+        self.lock = threading.Lock()
+        os.makedirs(out_dir, exist_ok=True)
+        self.tracing = not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start(frames)
+
+    def stage(self, name, race=None):
+        """Context manager profiling one stage, see telemetry.Telemetry.stage."""
+        return _ProfiledStage(self, name, race)
+
+    def close(self):
+        """Stop tracing allocations, which slows everything that runs afterwards."""
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    def _save(self, name, race, profile):
+        directory = os.path.join(self.out_dir, _slug(race))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        with self.lock:
+            if profile is not None:
+                stats = self.stats.get(path)
+                if stats is None:
+                    stats = self.stats[path] = pstats.Stats(profile)
+                else:
+                    stats.add(profile)
+                stats.dump_stats(path + ".prof")
+            tracemalloc.take_snapshot().dump(path + ".snapshot")
+
+
+class _ProfiledStage:
+    def __init__(self, profiler, name, race):
+        self.profiler = profiler
+        self.name = name
+        self.race = race
+        self.profile = None
+        self.outer = False
+
+    def __enter__(self):
+        local = self.profiler.local
+        if getattr(local, "active", False):
+            return self
+        local.active = self.outer = True
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            self.profile = profile
+        except ValueError:
+            # Another thread holds the process-wide profiler (Python 3.12+)
+            pass
+        return self
+
+    def __exit__(self, *exc):
+        if not self.outer:
+            return False
+        if self.profile is not None:
+            self.profile.disable()
+        self.profiler.local.active = False
+        self.profiler._save(self.name, self.race, self.profile)
+        return False
+
+
+def summarize(out_dir=PROFILE_DIR, top=15):
+    """
+    Summarize the files written by Profiler.
+
+    Lists the hottest functions over every stage and race by cumulative
+    time, the total time per stage, and the top allocation sites of the
+    largest memory snapshot.
+
+    Returns:
+        str: The summary, also written to `<out_dir>/summary.txt`
+    """
+    out = io.StringIO()
+    profiles = sorted(glob.glob(os.path.join(out_dir, "*", "*.prof")))
+    if not profiles:
+        return "No profiles recorded."
+
+    by_stage = {}
+    for path in profiles:
+        stage = os.path.splitext(os.path.basename(path))[0]
+        by_stage.setdefault(stage, []).append(path)
+    out.write(f"Profiled stages ({len(profiles)} files in {out_dir}):\n")
+    for stage, paths in sorted(by_stage.items()):
+        total = pstats.Stats(*paths).total_tt
+        out.write(f"  {stage:<20} {total:9.3f}s over {len(paths)} races\n")
+
+    out.write("\nHottest functions by cumulative time:\n")
+    stats = pstats.Stats(*profiles, stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(top)
+
+    snapshots = glob.glob(os.path.join(out_dir, "*", "*.snapshot"))
+    if snapshots:
+        largest, largest_path, size = None, None, -1
+        for path in snapshots:
+            snapshot = tracemalloc.Snapshot.load(path).filter_traces(_IGNORED)
+            total = sum(stat.size for stat in snapshot.statistics("filename"))
+            if total > size:
+                largest, largest_path, size = snapshot, path, total
+        out.write(
+            f"Top allocations in the largest snapshot ({largest_path}, {size / 1e6:.1f} MB):\n"
+        )
+        for stat in largest.statistics("lineno")[:top]:
+            out.write(f"  {stat}\n")
+
+    summary = out.getvalue()
+    with open(os.path.join(out_dir, "summary.txt"), "w", encoding="utf-8") as f:
+        f.write(summary)
+    return summary
@@ -0,0 +1,179 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import telemetry
+from lap_charts import load_lap_chart
+from plotting import get_custom_font, setup_plot_style
+from seasons import team_colors
+from validate import EMPTY
+
+RENDER_DIR = os.environ.get("LAPCHART_RENDER_DIR", "plots")
+
+# Font used for titles and labels, the matplotlib default when unset
+FONT_URL = os.environ.get("LAPCHART_FONT_URL")
+
+FIGURE_SIZE = (32, 18)
+
+# Colors for races whose car teams are unknown, matplotlib's tab20 palette;
+# distinct from each other without suggesting any team
+NEUTRAL_COLORS = (
+    "#1f77b4", "#aec7e8", "#ff7f0e", "#ffbb78", "#2ca02c",
+    "#98df8a", "#d62728", "#ff9896", "#9467bd", "#c5b0d5",
+    "#8c564b", "#c49c94", "#e377c2", "#f7b6d2", "#7f7f7f",
+    "#c7c7c7", "#bcbd22", "#dbdb8d", "#17becf", "#9edae5",
+)
+
+# Set up once per worker process by _init_worker
+_worker = {}
+
+
+def _init_worker(
+    font_url=FONT_URL, profile_dir=None, background="lightblue", text_color="black", dpi=100
+):
+    if profile_dir:
+        from profiling import Profiler
+
+        telemetry.set_profiler(Profiler(profile_dir))
+
+    with telemetry.stage("plot_setup"):
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        setup_plot_style(background, text_color)
+        _worker["font"] = get_custom_font(font_url) if font_url else None
+        _worker["figure"], _worker["axes"] = plt.subplots(figsize=FIGURE_SIZE, dpi=dpi)
+
+
+def car_colors(year, cars, car_teams=None):
+    """
+    Pick a line color for every car of a race.
+
+    Args:
+        year (int): The year of the race, selects seasons.team_colors
+        cars (list): Car numbers in grid order
+        car_teams (dict): Car number to team name; without it every car
+            gets a distinct neutral color, as guessing teams from car
+            numbers would show wrong team colors
+
+    Returns:
+        dict: Car number to color
+    """
+    if car_teams:
+        colors = team_colors(year)
+        return {car: colors.get(car_teams.get(car), "gray") for car in cars}
+    return {
+        car: NEUTRAL_COLORS[i % len(NEUTRAL_COLORS)] for i, car in enumerate(sorted(cars))
+    }
+
+
+def draw_lap_chart(axes, chart, colors, font=None):
+    """
+    Draw a lap chart as one line per car, in a single LineCollection.
+
+    Args:
+        axes (Axes): Axes to draw into, cleared first
+        chart (LapChart): Chart from lap_charts.load_lap_chart
+        colors (dict): Car number to color, see car_colors
+        font (FontProperties): Font of the title and labels
+    """
+    from matplotlib.collections import LineCollection
+
+    axes.clear()
+    cars = [int(car) for car in chart.drivers]
+    rows = np.arange(chart.positions.shape[1])
+    segments = []
+    for car in cars:
+        positions = chart.positions[car]
+        listed = positions != EMPTY
+        segments.append(np.column_stack((rows[listed], positions[listed])))
+    axes.add_collection(
+        LineCollection(segments, colors=[colors[car] for car in cars], linewidths=4)
+    )
+
+    axes.set_xlim(0, max(chart.laps, 1))
+    axes.set_ylim(len(cars) + 0.5, 0.5)
+    axes.set_yticks(range(1, len(cars) + 1), [str(car) for car in cars])
+    # fontproperties=None would reset the sizes set by setup_plot_style
+    text = {"fontproperties": font} if font else {}
+    axes.set_xlabel("Lap", **text)
+    axes.set_title(f"{chart.year} {chart.race.replace('_', ' ').title()} Lap Chart", **text)
+
+
+def render_race(year, race, out_dir=RENDER_DIR, car_teams=None):
+    """
+    Render the lap chart of one race to a PNG, in a worker set up by _init_worker.
+
+    Args:
+        year (int): The year of the race
+        race (str): Race name as formatted by process_race_data
+        out_dir (str): Directory the images are written to
+        car_teams (dict): Car number to team name, see car_colors
+
+    Returns:
+        str: Path of the image, None if the race could not be rendered
+    """
+    if not _worker:
+        _init_worker()
+    with telemetry.race(f"{year} {race}"):
+        try:
+            with telemetry.stage("chart_load"):
+                chart = load_lap_chart(year, race)
+        except (OSError, ValueError) as e:
+            print(f"Could not load the lap chart of {year} {race}: {e}")
+            return None
+        with telemetry.stage("draw"):
+            draw_lap_chart(
+                _worker["axes"],
+                chart,
+                car_colors(year, [int(car) for car in chart.drivers], car_teams),
+                _worker["font"],
+            )
+        path = os.path.join(out_dir, f"{year}_{chart.race}.png")
+        with telemetry.stage("save") as record:
+            _worker["figure"].savefig(path)
+            record["bytes"] = os.path.getsize(path)
+    return path
+
+
+def _render_job(job):
+    return render_race(*job)
+
+
+def render_races(races, out_dir=RENDER_DIR, workers=None, font_url=FONT_URL, profile_dir=None):
+    """
+    Render the lap charts of several races across a process pool.
+
+    Every worker sets up the plot style and font once and reuses one figure
+    for all the races it draws.
+
+    Args:
+        races (list): (year, race) tuples, race formatted as by process_race_data
+        out_dir (str): Directory the images are written to
+        workers (int): Worker processes, by default one per CPU
+        font_url (str): Font to download and use, see plotting.get_custom_font
+        profile_dir (str): Profile every worker into this directory, see profiling.Profiler
+
+    Returns:
+        list: Paths of the rendered images
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if font_url:
+        # Download the font here so the workers do not race for it
+        get_custom_font(font_url)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(font_url, profile_dir)
+    ) as pool:
+        jobs = [(year, race, out_dir) for year, race in races]
+        paths = [path for path in pool.map(_render_job, jobs, chunksize=4) if path]
+    elapsed = time.perf_counter() - start
+    print(
+        f"Rendered {len(paths)} lap charts in {elapsed:.1f}s "
+        f"({len(paths) / elapsed if elapsed else 0:.1f} charts/s)"
+    )
+    return paths
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+CACHE_PATH = os.environ.get("LAPCHART_URL_CACHE", "url_variants.json")
+
+FIA_BASE_URL = "https://www.fia.com"
+
+# Page variants seen on fia.com, there is no rule on which one a race uses
+VARIANTS = ("eventtiming-information", "eventtiming")
+
+
+def slug_formats(race_name):
+    """
+    Return the ways an event name can appear in an FIA URL, most common first.
+
+    Args:
+        race_name (str): Event name, e.g. "São Paulo Grand Prix"
+
+    Returns:
+        dict: Slug format name to slug
+    """
+    hyphen = race_name.replace(" ", "-")
+    ascii_slug = unicodedata.normalize("NFKD", hyphen).encode("ascii", "ignore").decode()
+    formats = {"hyphen": hyphen, "lower": hyphen.lower(), "ascii": ascii_slug.lower()}
+    # Drop formats that produce the same URL as an earlier one
+    unique = {}
+    for name, slug in formats.items():
+        if slug not in unique.values():
+            unique[name] = slug
+    return unique
+
+
+def event_page_url(year, slug, variant):
+    """Build the URL of an FIA event timing page."""
+    return (
+        f"{FIA_BASE_URL}/events/fia-formula-one-world-championship/"
+        f"season-{year}/{slug}/{variant}"
+    )
+
+
+class UrlResolver:
+    """
+    Find the event timing page of a race, remembering what worked.
+
+    The URL variants of a slug format are probed at the same time and the
+    first success wins. The winning slug format and variant are stored per
+    season and race, so later runs go straight to the right page.
+
+    Args:
+        cache_path (str): JSON file holding the learned variants
+    """
+
+    def __init__(self, cache_path=CACHE_PATH):
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        try:
+            with open(cache_path) as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    @staticmethod
+    def key(year, race_name):
+        return f"{year}/{race_name}"
+
+    def _save(self):
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp_path, self.cache_path)
+
+    def _remember(self, year, race_name, slug_format, variant):
+        entry = {"slug_format": slug_format, "variant": variant}
+        with self.lock:
+            if self.cache.get(self.key(year, race_name)) != entry:
+                self.cache[self.key(year, race_name)] = entry
+                self._save()
+
+    def resolve(self, year, race_name, probe):
+        """
+        Find the event page of a race.
+
+        Args:
+            year (int): The year of the race
+            race_name (str): Event name as returned by seasons.get_events
+            probe (callable): Called with a candidate URL, returns a non-None
+                result when the page is usable
+
+        Returns:
+            tuple: (url, probe result), or (None, None) if no candidate worked
+        """
+        slugs = slug_formats(race_name)
+        with self.lock:
+            learned = self.cache.get(self.key(year, race_name))
+
+        tried = set()
+        if learned and learned["slug_format"] in slugs:
+            url = event_page_url(year, slugs[learned["slug_format"]], learned["variant"])
+            tried.add(url)
+            try:
+                result = probe(url)
+            except Exception as e:
+                # The page may have moved; fall back to probing every variant
+                print(f"An error occurred probing {url}: {e}")
+                result = None
+            if result is not None:
+                return url, result
+
+        for slug_format, slug in slugs.items():
+            candidates = {}
+            for variant in VARIANTS:
+                url = event_page_url(year, slug, variant)
+                if url not in tried:
+                    candidates[url] = variant
+                    tried.add(url)
+            if not candidates:
+                continue
+
+            executor = ThreadPoolExecutor(max_workers=len(candidates))
+            try:
+                futures = {executor.submit(probe, url): url for url in candidates}
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"An error occurred probing {futures[future]}: {e}")
+                        continue
+                    if result is not None:
+                        url = futures[future]
+                        self._remember(year, race_name, slug_format, candidates[url])
+                        return url, result
+            finally:
+                # Do not wait for the slower probe once one has succeeded
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        return None, None
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_url_resolver():
+    """Return the UrlResolver shared by the whole process."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = UrlResolver()
+        return _shared
@@ -0,0 +1,184 @@
+import random
+import threading
+import time
+
+import requests
+
+import telemetry
+from pipeline import StopPipeline, TokenBucket
+
+DAY = 24 * 60 * 60
+
+
+class QuotaExhausted(StopPipeline):
+    """Raised once the daily model quota is used up; the run should stop."""
+
+
+class TransientError(Exception):
+    """A failure worth retrying, e.g. an HTTP 5xx from fia.com."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def error_status(error):
+    """Return the HTTP status carried by an exception, if any."""
+    # google.genai errors use `code`, our own and requests' use `status_code`
+    for attribute in ("code", "status_code"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_daily_quota_error(error):
+    """Check whether an error reports that the per-day quota is gone."""
+    if error_status(error) != 429:
+        return False
+    message = str(error).lower().replace(" ", "")
+    return "perday" in message or "daily" in message
+
+
+def is_transient(error):
+    """Check whether retrying the failed call may succeed."""
+    if isinstance(error, (TransientError, requests.ConnectionError, requests.Timeout)):
+        return True
+    status = error_status(error)
+    return status is not None and (status in (408, 429) or status >= 500)
+
+
+def backoff_delay(attempt, base_delay, max_delay, rand=random.random):
+    """Jittered exponential backoff: base * 2^attempt, scaled by 0.5-1.5."""
+    return min(max_delay, base_delay * 2**attempt) * (0.5 + rand())
+
+
+def retry(
+    func,
+    *args,
+    attempts=4,
+    base_delay=2,
+    max_delay=60,
+    sleep=time.sleep,
+    rand=random.random,
+    **kwargs,
+):
+    """
+    Call `func`, retrying transient failures with jittered exponential backoff.
+
+    Args:
+        func (callable): Function to call with `args` and `kwargs`
+        attempts (int): Calls made before the last error is raised
+        base_delay (float): Delay before the first retry, in seconds
+        max_delay (float): Upper bound of a single delay, before jitter
+        sleep (callable): Sleep function, injectable for tests
+        rand (callable): Returns a float in [0, 1), injectable for tests
+
+    Returns:
+        The result of `func`
+    """
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == attempts - 1 or not is_transient(e):
+                raise
+            delay = backoff_delay(attempt, base_delay, max_delay, rand)
+            print(f"Transient error ({e}), retrying in {delay:.1f} seconds")
+            telemetry.count_retry()
+            sleep(delay)
+
+
+class QuotaScheduler:
+    """
+    Pace model requests within a per-minute and per-day quota.
+
+    Requests only wait when the per-minute budget requires it. Transient
+    failures (429, 5xx, connection errors) are retried with jittered
+    exponential backoff, every attempt counting against the quota. When the
+    daily budget is used up, or the API says so, the circuit breaker trips
+    and every later request raises QuotaExhausted straight away.
+
+    Args:
+        rpm (int): Requests allowed per minute
+        rpd (int): Requests allowed per day
+        attempts (int): Calls made per request before giving up
+        base_delay (float): Delay before the first retry, in seconds
+        max_delay (float): Upper bound of a single delay, before jitter
+        clock (callable): Monotonic time source, injectable for tests
+        sleep (callable): Sleep function, injectable for tests
+        rand (callable): Returns a float in [0, 1), injectable for tests
+    """
+
+    def __init__(
+        self,
+        rpm=5,
+        rpd=50,
+        attempts=4,
+        base_delay=5,
+        max_delay=120,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rand=random.random,
+    ):
+        self.rpd = rpd
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self.rand = rand
+        self.minute = TokenBucket(rpm, 60, clock=clock, sleep=sleep)
+        self.day_started = clock()
+        self.used_today = 0
+        self.tripped = None
+        self.lock = threading.Lock()
+
+    def trip(self, reason):
+        """Open the circuit breaker, failing every later request."""
+        with self.lock:
+            if self.tripped is None:
+                print(f"Stopping model requests: {reason}")
+                self.tripped = reason
+
+    def acquire(self):
+        """
+        Wait until a request fits in the quota and count it.
+
+        Raises:
+            QuotaExhausted: The daily quota is used up
+        """
+        with self.lock:
+            if self.tripped is None and self.clock() - self.day_started >= DAY:
+                self.day_started = self.clock()
+                self.used_today = 0
+            if self.tripped is None and self.used_today >= self.rpd:
+                self.tripped = f"daily quota of {self.rpd} requests used"
+                print(f"Stopping model requests: {self.tripped}")
+            if self.tripped is not None:
+                raise QuotaExhausted(self.tripped)
+            self.minute.acquire()
+            self.used_today += 1
+
+    def call(self, func, *args, **kwargs):
+        """
+        Make one model request through the quota, retrying transient failures.
+
+        Raises:
+            QuotaExhausted: The daily quota is used up
+        """
+        for attempt in range(self.attempts):
+            self.acquire()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if is_daily_quota_error(e):
+                    self.trip(f"API reports the daily quota is exhausted ({e})")
+                    raise QuotaExhausted(self.tripped) from e
+                if attempt == self.attempts - 1 or not is_transient(e):
+                    raise
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay, self.rand)
+                print(f"Model request failed ({e}), retrying in {delay:.1f} seconds")
+                telemetry.count_retry()
+                self.sleep(delay)
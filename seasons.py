@@ -0,0 +1,287 @@
+import datetime
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+# Calendar, session formats and teams of every season
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seasons.json")
+
+Event = namedtuple("Event", "year race_id name sessions")
+
+
+def normalize_name(name):
+    """Fold case, spacing, hyphens and underscores so name variants compare equal."""
+    return " ".join(name.replace("_", " ").replace("-", " ").split()).casefold()
+
+
+def read_registry_data(path=REGISTRY_PATH):
+    """
+    Read the season data file.
+
+    Returns:
+        tuple: (data, duplicates) where `duplicates` lists the JSON object
+            keys that appear more than once, which json.load would silently
+            collapse
+    """
+    duplicates = []
+
+    def collect(pairs):
+        mapping = {}
+        for key, value in pairs:
+            if key in mapping:
+                duplicates.append(key)
+            mapping[key] = value
+        return mapping
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f, object_pairs_hook=collect), duplicates
+
+
+def check_registry(data, duplicates=()):
+    """
+    Look for duplicate or conflicting entries in season data.
+
+    Args:
+        data (dict): Parsed season data, see read_registry_data
+        duplicates (list): Keys that appeared more than once in the file
+
+    Returns:
+        list: Descriptions of the problems found, empty if the data is consistent
+    """
+    problems = [f"duplicate key {key!r}" for key in duplicates]
+    formats = data.get("session_formats", {})
+    for year, season in data.get("seasons", {}).items():
+        events = season.get("events", [])
+        inactive = season.get("inactive_events", [])
+        seen = set()
+        for name in events + inactive:
+            if normalize_name(name) in seen:
+                problems.append(f"{year}: event {name!r} listed twice")
+            seen.add(normalize_name(name))
+        if season.get("testing"):
+            seen.add(normalize_name(season["testing"]))
+
+        sessions = season.get("sessions", {})
+        if "default" not in sessions:
+            problems.append(f"{year}: no default session format")
+        for name, session_format in sessions.items():
+            if session_format not in formats:
+                problems.append(f"{year}: unknown session format {session_format!r} for {name}")
+            if name != "default" and normalize_name(name) not in seen:
+                problems.append(f"{year}: sessions given for {name!r}, which is not on the calendar")
+
+        owners = {}
+        codes = {}
+        for team, entry in season.get("teams", {}).items():
+            if entry["code"] in codes:
+                problems.append(
+                    f"{year}: code {entry['code']} used by {codes[entry['code']]} and {team}"
+                )
+            codes[entry["code"]] = team
+            for alias in [team] + entry.get("aliases", []):
+                owner = owners.setdefault(normalize_name(alias), team)
+                if owner != team:
+                    problems.append(f"{year}: {alias!r} names both {owner} and {team}")
+                elif alias != team and alias in entry["aliases"][: entry["aliases"].index(alias)]:
+                    problems.append(f"{year}: alias {alias!r} of {team} listed twice")
+    return problems
+
+
+class SeasonRegistry:
+    """
+    Immutable lookups over the season data file.
+
+    Everything is indexed when the registry is built: events by (year,
+    name) and by (year, race_id), session formats by event and team names
+    and aliases by their normalized form. Names are matched after
+    normalize_name, so "São Paulo Grand Prix" and "são_paulo_grand_prix"
+    find the same event.
+
+    Args:
+        data (dict): Parsed season data, see read_registry_data
+        duplicates (list): Keys that appeared more than once in the file
+
+    Raises:
+        ValueError: If check_registry finds duplicate or conflicting entries
+    """
+
+    def __init__(self, data, duplicates=()):
+        problems = check_registry(data, duplicates)
+        if problems:
+            raise ValueError("Inconsistent season data:\n  " + "\n  ".join(problems))
+
+        formats = {name: tuple(sessions) for name, sessions in data["session_formats"].items()}
+        self._events = {}
+        self._by_name = {}
+        self._sessions = {}
+        self._teams = {}
+        self._codes = {}
+        self._colors = {}
+        for year, season in data["seasons"].items():
+            year = int(year)
+            sessions = {
+                normalize_name(name): formats[session_format]
+                for name, session_format in season["sessions"].items()
+                if name != "default"
+            }
+            default = formats[season["sessions"]["default"]]
+            self._sessions[year] = (default, sessions)
+
+            events = tuple(season["events"])
+            self._events[year] = events
+            for race_id, name in enumerate(events, start=1):
+                event = Event(year, race_id, name, sessions.get(normalize_name(name), default))
+                self._by_name[(year, normalize_name(name))] = event
+
+            teams, codes, colors = {}, {}, {}
+            for team, entry in season["teams"].items():
+                for alias in [team] + entry.get("aliases", []):
+                    teams[normalize_name(alias)] = team
+                    codes[alias] = entry["code"]
+                    colors[alias] = entry["color"]
+            self._teams[year] = teams
+            self._codes[year] = MappingProxyType(codes)
+            self._colors[year] = MappingProxyType(colors)
+
+    def events(self, year):
+        """Names of the events of a season, in race_id order."""
+        return self._events.get(year, ())
+
+    def event(self, year, name):
+        """Return the Event of a season by name, None if it is not on the calendar."""
+        return self._by_name.get((year, normalize_name(name)))
+
+    def event_name(self, year, race_id):
+        """Return the name of the race_id-th event of a season (1-based)."""
+        events = self.events(year)
+        if not 1 <= race_id <= len(events):
+            raise IndexError(f"{year} has no race {race_id}")
+        return events[race_id - 1]
+
+    def race_id(self, year, name):
+        """Return the race_id of an event, None if it is not on the calendar."""
+        event = self.event(year, name)
+        return event.race_id if event else None
+
+    def sessions(self, year, name):
+        """Session names of an event, None for a season without data."""
+        if year not in self._sessions:
+            return None
+        default, sessions = self._sessions[year]
+        return sessions.get(normalize_name(name), default)
+
+    def team(self, year, name):
+        """Resolve a team name or alias to the team's canonical name, None if unknown."""
+        return self._teams.get(year, {}).get(normalize_name(name))
+
+    def team_codes(self, year):
+        """Read-only mapping of every team name and alias of a season to its code."""
+        return self._codes.get(year, MappingProxyType({}))
+
+    def team_colors(self, year):
+        """Read-only mapping of every team name and alias of a season to its color."""
+        return self._colors.get(year, MappingProxyType({}))
+
+
+@lru_cache(maxsize=None)
+def get_registry(path=REGISTRY_PATH):
+    """Build the season registry from the data file, once per process."""
+    return SeasonRegistry(*read_registry_data(path))
+
+
+def get_years():
+    """Get a list of available years for the race starting from current year to 2018."""
+    current_year = datetime.datetime.now().year
+    years = list(range(current_year, 2017, -1))
+
+    return years
+
+
+def get_events(year):
+    """List of the event names of a season, in race_id order; callers may modify it."""
+    return list(get_registry().events(year))
+
+
+def event_name(year, race_id):
+    """Return the name of the race_id-th event of a season (1-based)."""
+    return get_registry().event_name(year, race_id)
+
+
+def get_sessions(year, event):
+    """List of the session names of an event, None for a season without data."""
+    sessions = get_registry().sessions(year, event)
+    return None if sessions is None else list(sessions)
+
+
+
+
+# make sure that year can be from 2018 to current year
+class LatestData:
+    """
+    Meetings and sessions of a season from the F1 live timing index.
+
+    The index comes from livetiming.IndexCache, so constructing this does
+    not touch the network while a fresh copy is cached on disk. Meetings
+    and their sessions are indexed by name.
+
+    Args:
+        year (int): The season
+        data (dict): Parsed Index.json, loaded through the cache when None
+    """
+
+    def __init__(self, year, data=None):
+
+        self.year = year
+        self.data = data if data is not None else self.get_f1_data()
+        meetings = self.data.get("Meetings", []) if self.data else []
+        self.meetings = {meeting["Name"]: meeting for meeting in meetings}
+        self.sessions = {
+            meeting["Name"]: {session["Name"]: session for session in meeting["Sessions"]}
+            for meeting in meetings
+        }
+        self.events = self.get_events()
+
+    def get_f1_data(self):
+        from livetiming import get_index_cache
+
+        return get_index_cache().get(self.year)
+
+    def get_events(self):
+        return list(self.meetings)
+
+    def get_sessions(self, event):
+        return list(self.sessions.get(event, {}))
+
+    def get_session(self, event, session):
+        """Return the index entry of one session, None if there is none."""
+        return self.sessions.get(event, {}).get(session)
+
+
+def load_latest_data(years=None):
+    """
+    Load LatestData for several seasons, fetching their indexes concurrently.
+
+    Args:
+        years (list): Seasons to load, all of get_years by default
+
+    Returns:
+        dict: Year to LatestData
+    """
+    from livetiming import get_index_cache
+
+    indexes = get_index_cache().get_many(years or get_years())
+    # An empty index stands in for seasons that could not be loaded, so the
+    # constructor does not try them again one by one
+    return {year: LatestData(year, data or {}) for year, data in indexes.items()}
+
+
+def team_codes(year: int) -> dict:
+    """Team name or alias to team code, a copy of SeasonRegistry.team_codes."""
+    return dict(get_registry().team_codes(year))
+
+
+def team_colors(year: int) -> dict:
+    """Team name or alias to plot color, a copy of SeasonRegistry.team_colors."""
+    return dict(get_registry().team_colors(year))
@@ -0,0 +1,227 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+# JSON-lines log of every stage, none when unset
+LOG_PATH = os.environ.get("LAPCHART_STAGE_LOG")
+
+# Prometheus textfile written by Telemetry.flush, none when unset
+PROMETHEUS_PATH = os.environ.get("LAPCHART_PROMETHEUS")
+
+# Token counts read from the model's usage metadata
+TOKEN_FIELDS = {
+    "prompt": "prompt_token_count",
+    "output": "candidates_token_count",
+    "total": "total_token_count",
+}
+
+_race = contextvars.ContextVar("race", default=None)
+_record = contextvars.ContextVar("record", default=None)
+
+# Profiler wrapped around every stage, see profiling.Profiler
+_profiler = None
+
+
+def set_profiler(profiler):
+    """Profile every stage from now on with `profiler`, or stop with None."""
+    global _profiler
+    _profiler = profiler
+
+
+@contextlib.contextmanager
+def race(label):
+    """Attribute the stages run inside the block to a race, e.g. "2024 Bahrain Grand Prix"."""
+    token = _race.set(str(label))
+    try:
+        yield
+    finally:
+        _race.reset(token)
+
+
+def current_race():
+    return _race.get()
+
+
+def count_retry():
+    """Count a retry against the stage running in this thread, if any."""
+    record = _record.get()
+    if record is not None:
+        record["retries"] = record.get("retries", 0) + 1
+
+
+@contextlib.contextmanager
+def collecting(record):
+    """Send count_retry and annotate calls made inside the block to `record`."""
+    token = _record.set(record)
+    try:
+        yield record
+    finally:
+        _record.reset(token)
+
+
+def annotate(**fields):
+    """Add fields, e.g. bytes=..., to the record of the stage running in this thread."""
+    record = _record.get()
+    if record is not None:
+        record.update(fields)
+
+
+def record_usage(record, response):
+    """Copy the token counts of a model response into a stage record."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    for kind, attribute in TOKEN_FIELDS.items():
+        value = getattr(usage, attribute, None)
+        if isinstance(value, int):
+            record[f"{kind}_tokens"] = value
+
+
+def _sample(value):
+    """Format a counter value without losing precision, e.g. byte counts."""
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Telemetry:
+    """
+    Per-stage timings and counters of an extraction run.
+
+    Every stage call becomes one record holding its duration, outcome and
+    whatever the stage adds (bytes, retries, token counts). Records are
+    appended to a JSON-lines log as they finish and summed into counters
+    that `flush` writes in the Prometheus textfile format.
+
+    Args:
+        log_path (str): JSON-lines file records are appended to, None for no log
+        prometheus_path (str): Textfile written by flush, None for no textfile
+        clock (callable): Time source for durations
+    """
+
+    def __init__(self, log_path=LOG_PATH, prometheus_path=PROMETHEUS_PATH, clock=time.perf_counter):
+        self.log_path = log_path
+        self.prometheus_path = prometheus_path
+        self.clock = clock
+        self.totals = {}
+        self.tokens = {}
+        self.lock = threading.Lock()
+        self._log = open(log_path, "a", encoding="utf-8") if log_path else None
+
+    @contextlib.contextmanager
+    def stage(self, name, **fields):
+        """
+        Time a stage; the yielded dict takes extra fields such as "bytes".
+
+        Exceptions are recorded as a failure and re-raised.
+        """
+        record = {"stage": name, "race": current_race(), **fields}
+        token = _record.set(record)
+        if _profiler is None:
+            profiling = contextlib.nullcontext()
+        else:
+            profiling = _profiler.stage(name, record["race"])
+        start = self.clock()
+        try:
+            with profiling:
+                yield record
+        except BaseException as e:
+            record["ok"] = False
+            record["error"] = type(e).__name__
+            raise
+        finally:
+            record["seconds"] = round(self.clock() - start, 6)
+            record.setdefault("ok", True)
+            _record.reset(token)
+            self._finish(record)
+
+    def record(self, name, seconds, ok=True, **fields):
+        """Add a record for a stage timed by the caller, see stage."""
+        record = {"stage": name, "race": current_race(), **fields}
+        record["seconds"] = round(seconds, 6)
+        record["ok"] = ok
+        self._finish(record)
+
+    def _finish(self, record):
+        record["time"] = round(time.time(), 3)
+        with self.lock:
+            totals = self.totals.setdefault(
+                record["stage"], {"calls": 0, "failures": 0, "seconds": 0.0, "bytes": 0, "retries": 0}
+            )
+            totals["calls"] += 1
+            totals["failures"] += not record["ok"]
+            totals["seconds"] += record["seconds"]
+            totals["bytes"] += record.get("bytes", 0)
+            totals["retries"] += record.get("retries", 0)
+            for kind in TOKEN_FIELDS:
+                if f"{kind}_tokens" in record:
+                    self.tokens[kind] = self.tokens.get(kind, 0) + record[f"{kind}_tokens"]
+            if self._log is not None:
+                self._log.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._log.flush()
+
+    def prometheus(self):
+        """Render the counters in the Prometheus text exposition format."""
+        metrics = [
+            ("lapchart_stage_calls_total", "calls", "Stage calls"),
+            ("lapchart_stage_failures_total", "failures", "Stage calls that raised"),
+            ("lapchart_stage_seconds_total", "seconds", "Seconds spent in the stage"),
+            ("lapchart_stage_bytes_total", "bytes", "Bytes fetched, uploaded or written"),
+            ("lapchart_stage_retries_total", "retries", "Retries of transient failures"),
+        ]
+        lines = []
+        with self.lock:
+            for metric, key, help_text in metrics:
+                lines.append(f"# HELP {metric} {help_text}.")
+                lines.append(f"# TYPE {metric} counter")
+                for stage, totals in sorted(self.totals.items()):
+                    lines.append(f'{metric}{{stage="{stage}"}} {_sample(totals[key])}')
+            lines.append("# HELP lapchart_model_tokens_total Tokens reported by the model.")
+            lines.append("# TYPE lapchart_model_tokens_total counter")
+            for kind, value in sorted(self.tokens.items()):
+                lines.append(f'lapchart_model_tokens_total{{kind="{kind}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Write the Prometheus textfile, atomically so a scrape never sees half of it."""
+        if not self.prometheus_path:
+            return
+        tmp_path = f"{self.prometheus_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp_path, self.prometheus_path)
+
+    def close(self):
+        self.flush()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_telemetry():
+    """Return the Telemetry shared by the whole process."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Telemetry()
+        return _shared
+
+
+def configure(log_path=None, prometheus_path=None):
+    """Replace the shared Telemetry with one writing to the given files."""
+    global _shared
+    with _shared_lock:
+        if _shared is not None:
+            _shared.close()
+        _shared = Telemetry(log_path or LOG_PATH, prometheus_path or PROMETHEUS_PATH)
+        return _shared
+
+
+def stage(name, **fields):
+    """Time a stage with the shared Telemetry, see Telemetry.stage."""
+    return get_telemetry().stage(name, **fields)
@@ -0,0 +1,14 @@
+import numpy as np
+
+from analytics import position_matrix
+from validate import EMPTY
+
+
+def test_position_matrix_lists_each_car_position_per_row():
+    cars = np.array([[1, 44, 16], [44, 1, EMPTY]], np.int16)
+    positions = position_matrix(cars)
+    assert positions.shape == (2, 45)
+    assert positions.dtype == np.int16
+    assert positions[:, 44].tolist() == [2, 1]
+    assert positions[:, 16].tolist() == [3, EMPTY]
+    assert (positions[:, 2] == EMPTY).all()
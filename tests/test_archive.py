@@ -0,0 +1,30 @@
+from archive import RowChecker
+
+HEADER = ["POS", "1", "2", "3"]
+
+
+def test_row_checker_wants_the_grid_after_the_header():
+    checker = RowChecker()
+    assert checker.check(HEADER) is None
+    assert checker.check(["LAP 1", "44", "1", "16"]) == "expected GRID, found 'LAP 1'"
+
+
+def test_row_checker_follows_the_laps():
+    checker = RowChecker()
+    for row in (HEADER, ["GRID", "1", "44", "16"], ["LAP 1", "44", "1", "16"]):
+        assert checker.check(row) is None
+    assert checker.check(["LAP 3", "44", "1", "16"]) == "expected LAP 2, found 'LAP 3'"
+    assert checker.check(["LAP 2", "44", "1", "16", "5"]) == "LAP 2: more cars than positions"
+
+
+def test_row_checker_page_may_start_at_any_lap():
+    checker = RowChecker(page=True)
+    for row in (HEADER, ["LAP 67", "44", "1", "16"], ["LAP 68", "44", "1", "16"]):
+        assert checker.check(row) is None
+    assert checker.check(["LAP 70", "44", "1", "16"]) == "expected LAP 69, found 'LAP 70'"
+
+
+def test_row_checker_page_rejects_other_rows():
+    checker = RowChecker(page=True)
+    assert checker.check(HEADER) is None
+    assert checker.check(["Race Lap Chart"]) == "expected GRID or LAP n, found 'Race Lap Chart'"
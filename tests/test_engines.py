@@ -0,0 +1,219 @@
+import pymupdf
+import pytest
+
+import telemetry
+from engines import GeminiEngine, PagedEngine, StreamAborted, split_batch_response, stitch_pages
+from offline import FakeApiError, FakeClient
+from scheduler import QuotaExhausted, QuotaScheduler
+
+PAGE_TABLE = "POS,1,2,3\nLAP 67,44,1,16\nLAP 68,44,16,1"
+
+
+def fake_client(*tables, **kwargs):
+    kwargs = {"latency": 0, "upload_latency": 0, "chunk_size": 7, **kwargs}
+    return FakeClient({}, tables, **kwargs)
+
+
+def pdf_file(tmp_path):
+    path = tmp_path / "chart.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    return str(path)
+
+
+def test_streamed_page_may_start_without_the_grid(tmp_path):
+    engine = GeminiEngine(client=fake_client(PAGE_TABLE), stream=True, page=True)
+    assert list(engine.extract_rows(pdf_file(tmp_path))) == PAGE_TABLE.split("\n")
+
+
+def test_streamed_table_without_the_grid_is_aborted(tmp_path):
+    engine = GeminiEngine(client=fake_client(PAGE_TABLE), stream=True)
+    with pytest.raises(StreamAborted, match="expected GRID"):
+        list(engine.extract_rows(pdf_file(tmp_path)))
+
+
+TABLE = "POS,1,2,3\nGRID,1,44,16\n" + "\n".join(f"LAP {lap},44,1,16" for lap in range(1, 6))
+
+
+def failing_first(client, error):
+    """Make the first model request of a fake client fail with `error`."""
+    answer = client.answer
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise error
+        return answer(*args, **kwargs)
+
+    client.answer = flaky
+    return calls
+
+
+def test_streamed_request_is_retried_by_the_scheduler(tmp_path):
+    client = fake_client(TABLE)
+    calls = failing_first(client, FakeApiError(429, "RESOURCE_EXHAUSTED: per minute"))
+    scheduler = QuotaScheduler(rpm=60, rpd=10, sleep=lambda seconds: None)
+    engine = GeminiEngine(client=client, stream=True, scheduler=scheduler)
+    assert list(engine.extract_rows(pdf_file(tmp_path))) == TABLE.split("\n")
+    assert len(calls) == 2
+    assert scheduler.used_today == 2
+
+
+def test_streamed_daily_quota_error_trips_the_breaker(tmp_path):
+    client = fake_client(TABLE)
+    failing_first(client, FakeApiError(429, "Quota exceeded: requests per day"))
+    scheduler = QuotaScheduler(rpm=60, rpd=10, sleep=lambda seconds: None)
+    engine = GeminiEngine(client=client, stream=True, scheduler=scheduler)
+    with pytest.raises(QuotaExhausted):
+        list(engine.extract_rows(pdf_file(tmp_path)))
+    assert scheduler.tripped is not None
+
+
+def test_split_batch_response():
+    text = (
+        "Here are the tables.\n"
+        "=== TABLE 1 ===\n```csv\nPOS,1\nGRID,44\n```\n"
+        "== TABLE 2 ==\nPOS,1\nGRID,16\n"
+    )
+    assert split_batch_response(text) == {1: "POS,1\nGRID,44", 2: "POS,1\nGRID,16"}
+
+
+def test_split_batch_response_without_delimiters():
+    assert split_batch_response("POS,1\nGRID,44") == {}
+
+
+def pdf_files(tmp_path, count):
+    files = []
+    for number in range(count):
+        path = tmp_path / f"chart{number}.pdf"
+        path.write_bytes(b"%PDF-1.4 " + bytes([number]))
+        files.append(str(path))
+    return files
+
+
+def truncating_first(client, retry=None):
+    """
+    Cut the second table of the first batch answer short.
+
+    Later requests raise `retry` if it is an exception, or are answered
+    with it if it is a string.
+    """
+    answer = client.answer
+    calls = []
+
+    def truncating(model, contents, **kwargs):
+        calls.append(contents)
+        if len(calls) > 1 and isinstance(retry, Exception):
+            raise retry
+        response = answer(model, contents, **kwargs)
+        if len(calls) > 1 and retry is not None:
+            response.text = retry
+        elif len(calls) == 1:
+            tables = split_batch_response(response.text)
+            tables[2] = "POS,1,2,3"
+            response.text = "\n".join(f"=== TABLE {n} ===\n{t}" for n, t in tables.items())
+        return response
+
+    client.answer = truncating
+    return calls
+
+
+def test_batch_requests_only_the_malformed_tables_again(tmp_path):
+    client = fake_client(TABLE)
+    files = pdf_files(tmp_path, 3)
+    calls = truncating_first(client)
+    tables = GeminiEngine(client=client).extract_batch(files)
+    assert tables == {path: TABLE for path in files}
+    assert len(calls) == 2
+    # The retry carries only the table that was cut short
+    assert sum(part.file_data is not None for part in calls[1][0].parts) == 1
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_failed_batch_retry_keeps_the_accepted_tables(tmp_path, stream):
+    client = fake_client(TABLE)
+    files = pdf_files(tmp_path, 3)
+    truncating_first(client, FakeApiError(500, "INTERNAL"))
+    tables = GeminiEngine(client=client, stream=stream).extract_batch(files)
+    assert tables == {files[0]: TABLE, files[1]: None, files[2]: TABLE}
+
+
+def test_aborted_batch_retry_keeps_the_accepted_tables(tmp_path):
+    client = fake_client(TABLE)
+    files = pdf_files(tmp_path, 3)
+    # The streamed retry starts without the GRID
+    truncating_first(client, "POS,1,2,3\nLAP 3,44,1,16")
+    tables = GeminiEngine(client=client, stream=True).extract_batch(files)
+    assert tables == {files[0]: TABLE, files[1]: None, files[2]: TABLE}
+
+
+def test_quota_stop_during_batch_retry_carries_the_accepted_tables(tmp_path):
+    client = fake_client(TABLE)
+    files = pdf_files(tmp_path, 3)
+    truncating_first(client, FakeApiError(429, "Quota exceeded: requests per day"))
+    scheduler = QuotaScheduler(rpm=60, rpd=10, sleep=lambda seconds: None)
+    engine = GeminiEngine(client=client, scheduler=scheduler)
+    with pytest.raises(QuotaExhausted) as raised:
+        engine.extract_batch(files)
+    assert raised.value.results == {files[0]: TABLE, files[1]: None, files[2]: TABLE}
+
+
+PAGE_1 = "POS,1,2\nGRID,1,44\nLAP 1,44,1\nLAP 2,44,1"
+
+
+def test_stitch_pages_drops_laps_repeated_on_the_next_page():
+    page_2 = "POS,1,2\nLAP 2,44,1\nLAP 3,1,44"
+    assert stitch_pages([PAGE_1, page_2]) == PAGE_1 + "\nLAP 3,1,44"
+
+
+def test_stitch_pages_fails_on_a_missing_lap():
+    assert stitch_pages([PAGE_1, "POS,1,2\nLAP 4,1,44"]) is None
+
+
+def test_stitch_pages_fails_on_an_empty_page():
+    assert stitch_pages([PAGE_1, None]) is None
+
+
+def test_stitch_pages_needs_the_grid():
+    assert stitch_pages(["POS,1,2\nLAP 1,44,1"]) is None
+
+
+def test_stitch_pages_rejects_unexpected_rows():
+    assert stitch_pages([PAGE_1 + "\nFastest lap,44,1"]) is None
+
+
+class PageEngine:
+    """Engine reading the pages of a two-page chart, noting the race of each call."""
+
+    name = "pages"
+    tables = {"1": PAGE_1, "2": "POS,1,2\nLAP 2,44,1\nLAP 3,1,44"}
+
+    def __init__(self):
+        self.races = []
+
+    def extract(self, page_file):
+        self.races.append(telemetry.current_race())
+        return self.tables[page_file[-5]]
+
+    def extract_laps(self, page_file, labels):
+        self.races.append(telemetry.current_race())
+        return {label: [label] for label in labels}
+
+
+def two_page_pdf(tmp_path):
+    path = tmp_path / "chart.pdf"
+    with pymupdf.open() as document:
+        document.new_page().insert_text((72, 72), "GRID LAP 1 LAP 2")
+        document.new_page().insert_text((72, 72), "LAP 2 LAP 3")
+        document.save(str(path))
+    return str(path)
+
+
+def test_pages_run_in_the_race_context(tmp_path):
+    pdf = two_page_pdf(tmp_path)
+    pages = PageEngine()
+    engine = PagedEngine(pages, workers=2)
+    with telemetry.race("2024 Monaco Grand Prix"):
+        assert engine.extract(pdf) == PAGE_1 + "\nLAP 3,1,44"
+        assert engine.extract_laps(pdf, ["LAP 1", "LAP 3"]) == {"LAP 1": ["LAP 1"], "LAP 3": ["LAP 3"]}
+    assert pages.races == ["2024 Monaco Grand Prix"] * 4
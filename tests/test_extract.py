@@ -0,0 +1,70 @@
+import pytest
+
+from engines import pick_rows
+from extract import generate_csvs_from_pdfs, repair_suspect_laps
+from scheduler import QuotaExhausted
+
+# LAP 2 lists car 44 twice and LAP 3 is missing from the table
+TABLE = "POS,1,2,3\nGRID,1,44,16\nLAP 1,44,1,16\nLAP 2,44,44,1\nLAP 4,44,16,1\nLAP 5,44,16,1"
+ROWS = "POS,1,2,3\nLAP 2,44,16,1\nLAP 3,44,16,1"
+
+
+class RowEngine:
+    """Engine answering row requests from a fixed table."""
+
+    def __init__(self, table):
+        self.table = table
+        self.requests = []
+
+    def extract_laps(self, pdf_file, labels):
+        self.requests.append(labels)
+        return pick_rows(self.table, labels)
+
+
+def test_suspect_and_missing_rows_are_spliced_in():
+    engine = RowEngine(ROWS)
+    repaired = repair_suspect_laps(TABLE, "chart.pdf", engine)
+    assert engine.requests == [["LAP 2", "LAP 3"]]
+    assert repaired.split("\n") == [
+        "POS,1,2,3",
+        "GRID,1,44,16",
+        "LAP 1,44,1,16",
+        "LAP 2,44,16,1",
+        "LAP 3,44,16,1",
+        "LAP 4,44,16,1",
+        "LAP 5,44,16,1",
+    ]
+
+
+def test_partial_answer_keeps_the_original_table():
+    # Only LAP 2 comes back; splicing it would leave a bare LAP 3 row
+    engine = RowEngine("POS,1,2,3\nLAP 2,44,16,1")
+    assert repair_suspect_laps(TABLE, "chart.pdf", engine) == TABLE
+
+
+def test_clean_table_is_not_requested_again():
+    clean = "POS,1,2,3\nGRID,1,44,16\nLAP 1,44,1,16"
+    engine = RowEngine(ROWS)
+    assert repair_suspect_laps(clean, "chart.pdf", engine) == clean
+    assert engine.requests == []
+
+
+class StoppingEngine:
+    """Engine whose batch stops the run after reading the first table."""
+
+    def extract_batch(self, pdf_files):
+        error = QuotaExhausted("daily quota used up")
+        error.results = {pdf_file: None for pdf_file in pdf_files}
+        error.results[pdf_files[0]] = TABLE
+        raise error
+
+
+def test_tables_read_before_a_stop_are_saved(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("a.pdf", "b.pdf"):
+        (tmp_path / name).write_bytes(b"%PDF-1.4")
+    races = [("a.pdf", 2024, "monaco"), ("b.pdf", 2024, "imola")]
+    with pytest.raises(QuotaExhausted):
+        generate_csvs_from_pdfs(races, StoppingEngine())
+    assert (tmp_path / "2024_monaco.csv").read_text() == TABLE
+    assert not (tmp_path / "2024_imola.csv").exists()
@@ -0,0 +1,54 @@
+import pytest
+
+from http_cache import HttpCache
+from offline import ReplayServer, Resource
+
+PAGE = "<html><body>Lap Chart</body></html>".encode("utf-8")
+
+
+@pytest.fixture
+def server():
+    resources = {"/page": Resource(PAGE, "text/html; charset=utf-8")}
+    with ReplayServer(resources) as server:
+        yield server
+
+
+def test_unchanged_page_is_revalidated_with_a_304(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    first = cache.get(server.url + "/page")
+    assert first.status_code == 200
+    assert not first.from_cache
+    sent = server.bytes_sent
+
+    second = cache.get(server.url + "/page")
+    assert second.status_code == 200
+    assert second.from_cache
+    assert second.content == PAGE
+    assert second.text == PAGE.decode("utf-8")
+    assert second.headers["ETag"] == server.resources["/page"].etag
+    # The 304 carried no body
+    assert server.bytes_sent == sent
+    assert server.requests == {"GET": 2}
+
+
+def test_changed_page_is_downloaded_again(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.get(server.url + "/page")
+    server.resources["/page"] = Resource(b"<html>new</html>", "text/html; charset=utf-8")
+
+    response = cache.get(server.url + "/page")
+    assert not response.from_cache
+    assert response.content == b"<html>new</html>"
+    assert cache.get(server.url + "/page").from_cache
+
+
+def test_cache_is_shared_through_the_disk(server, tmp_path):
+    HttpCache(str(tmp_path)).get(server.url + "/page")
+    assert HttpCache(str(tmp_path)).get(server.url + "/page").from_cache
+
+
+def test_missing_page_is_not_cached(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert cache.get(server.url + "/missing").status_code == 404
+    assert cache.get(server.url + "/missing").status_code == 404
+    assert list(tmp_path.iterdir()) == []
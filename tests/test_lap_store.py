@@ -0,0 +1,65 @@
+import os
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from lap_store import build_store, export_parquet, open_store
+from validate import EMPTY, read_chart
+
+CHARTS = {
+    "2024_monaco_grand_prix.csv": "POS,1,2,3\nGRID,16,81,55\nLAP 1,16,81,55\nLAP 2,16,81",
+    "2024_bahrain_grand_prix.csv": "POS,1,2\nGRID,1,11\nLAP 1,1,11",
+}
+
+
+def archive(tmp_path):
+    directory = tmp_path / "archive"
+    directory.mkdir()
+    for name, csv_content in CHARTS.items():
+        (directory / name).write_text(csv_content)
+    return str(directory)
+
+
+def test_store_round_trips_the_archive(tmp_path):
+    archive_dir = archive(tmp_path)
+    path = str(tmp_path / "lap_charts.bin")
+    build_store(archive_dir, path).close()
+
+    store = open_store(path)
+    assert len(store) == 2
+    assert isinstance(store.cars, np.memmap)
+    for name in CHARTS:
+        cars, laps, _ = read_chart(os.path.join(archive_dir, name))
+        race = name[5:-4]
+        assert np.array_equal(store.chart(2024, race), cars)
+        assert store.races[store.index[(2024, race)]]["laps"] == laps.max()
+    store.close()
+    assert store.cars is None
+
+
+def test_rebuild_parses_only_changed_files(tmp_path, capsys):
+    archive_dir = archive(tmp_path)
+    path = str(tmp_path / "lap_charts.bin")
+    build_store(archive_dir, path).close()
+    changed = os.path.join(archive_dir, "2024_bahrain_grand_prix.csv")
+    with open(changed, "a") as f:
+        f.write("\nLAP 2,11,1")
+
+    store = build_store(archive_dir, path)
+    assert "2 races, 1 parsed from CSV" in capsys.readouterr().out
+    assert store.chart(2024, "bahrain_grand_prix").tolist() == [[1, 11], [1, 11], [11, 1]]
+    store.close()
+
+
+def test_parquet_export(tmp_path):
+    store = build_store(archive(tmp_path), str(tmp_path / "lap_charts.bin"))
+    path = str(tmp_path / "lap_charts.parquet")
+    export_parquet(store, path)
+    table = pq.read_table(path).to_pydict()
+    assert table["race"][:3] == ["bahrain_grand_prix"] * 2 + ["monaco_grand_prix"]
+    assert table["lap"] == [0, 1, 0, 1, 2]
+    assert table["1"] == [1, 1, 16, 16, 16]
+    # Empty cells are nulls, not EMPTY
+    assert table["3"] == [None, None, 55, 55, None]
+    assert EMPTY not in table["2"]
+    store.close()
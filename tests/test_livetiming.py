@@ -0,0 +1,64 @@
+import datetime
+import json
+import time
+
+import pytest
+
+import http_cache
+import livetiming
+from http_cache import HttpCache
+from livetiming import IndexCache
+from offline import ReplayServer, Resource
+
+# A season still running, whose index expires
+YEAR = datetime.date.today().year
+
+INDEX = {"Year": YEAR, "Meetings": [{"Name": "Bahrain Grand Prix", "Sessions": []}]}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    body = json.dumps(INDEX).encode("utf-8-sig")
+    resources = {f"/static/{YEAR}/Index.json": Resource(body, "application/json")}
+    with ReplayServer(resources) as server:
+        monkeypatch.setattr(livetiming, "INDEX_URL", server.url + "/static/{year}/Index.json")
+        monkeypatch.setattr(http_cache, "get", HttpCache(str(tmp_path / "http")).get)
+        yield server
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return IndexCache(str(tmp_path / "index"), ttl=60)
+
+
+def write_entry(cache, year, fetched_at, data):
+    with open(cache._path(year), "w", encoding="utf-8") as f:
+        json.dump({"year": year, "fetched_at": fetched_at, "data": data}, f)
+
+
+def test_fresh_index_is_not_fetched_again(server, cache):
+    assert cache.get(YEAR) == INDEX
+    assert cache.get(YEAR) == INDEX
+    assert server.requests == {"GET": 1}
+
+
+def test_index_of_a_running_season_expires(server, cache):
+    write_entry(cache, YEAR, time.time() - 120, {"Meetings": []})
+    assert cache.cached(YEAR) is None
+    assert cache.get(YEAR) == INDEX
+    assert server.requests == {"GET": 1}
+
+
+def test_index_fetched_after_its_season_never_expires(server, cache):
+    fetched_at = time.mktime((YEAR, 1, 2, 0, 0, 0, 0, 0, -1))
+    write_entry(cache, YEAR - 1, fetched_at, {"Meetings": []})
+    assert cache.get(YEAR - 1) == {"Meetings": []}
+    assert server.requests == {}
+
+
+def test_stale_index_is_used_when_the_refresh_fails(server, cache):
+    # The server has no index for next season yet
+    write_entry(cache, YEAR + 1, time.time() - 120, {"Meetings": []})
+    assert cache.get(YEAR + 1) == {"Meetings": []}
+    assert server.requests == {"GET": 1}
+    assert cache.get_many([YEAR, YEAR + 1]) == {YEAR: INDEX, YEAR + 1: {"Meetings": []}}
@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+import requests
+
+from offline import ReplayServer, Resource
+from pdf_store import PdfStore
+
+URL = "https://www.fia.com/sites/default/files/lap_chart.pdf"
+
+
+class HeadSession:
+    """Session answering HEAD requests with fixed headers."""
+
+    def __init__(self, headers):
+        self.headers = headers
+
+    def head(self, url, **kwargs):
+        return type("Response", (), {"status_code": 200, "headers": self.headers})()
+
+
+def test_malformed_content_length_is_not_current(tmp_path):
+    store = PdfStore(str(tmp_path), session=HeadSession({"Content-Length": "12k"}))
+    entry = {"digest": "0" * 64, "url": URL, "size": 12000, "last_modified": None, "etag": None}
+    assert not store.is_current(entry, URL)
+    store.session = HeadSession({"Content-Length": "12000"})
+    assert store.is_current(entry, URL)
+
+
+PDF = b"%PDF-1.4\n" + bytes(range(256)) * 400
+
+
+@pytest.fixture
+def server():
+    with ReplayServer({"/lap_chart.pdf": Resource(PDF, "application/pdf")}) as server:
+        yield server
+
+
+def store_with_partial(tmp_path, url, content, etag):
+    """A store holding the first part of `content` from an interrupted download."""
+    store = PdfStore(str(tmp_path), session=requests.Session())
+    part_path, meta_path = store._partial_paths(url)
+    with open(part_path, "wb") as f:
+        f.write(content[: len(content) // 3])
+    with open(meta_path, "w") as f:
+        json.dump({"etag": etag, "last_modified": None}, f)
+    return store
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_interrupted_download_is_resumed(server, tmp_path):
+    url = server.url + "/lap_chart.pdf"
+    store = store_with_partial(tmp_path, url, PDF, server.resources["/lap_chart.pdf"].etag)
+    path = store.fetch(url, 2024, "monaco")
+    assert read(path) == PDF
+    # Only the missing bytes were sent
+    assert server.bytes_sent == len(PDF) - len(PDF) // 3
+    assert not os.listdir(tmp_path / "partial")
+
+
+def test_changed_file_is_downloaded_whole(server, tmp_path):
+    url = server.url + "/lap_chart.pdf"
+    store = store_with_partial(tmp_path, url, PDF, server.resources["/lap_chart.pdf"].etag)
+    changed = PDF[::-1]
+    server.resources["/lap_chart.pdf"] = Resource(changed, "application/pdf")
+    # If-Range no longer matches, so the server answers with the whole file
+    path = store.fetch(url, 2024, "monaco")
+    assert read(path) == changed
+    assert server.bytes_sent == len(changed)
+
+
+def test_unchanged_file_is_not_downloaded_again(server, tmp_path):
+    url = server.url + "/lap_chart.pdf"
+    store = PdfStore(str(tmp_path), session=requests.Session())
+    first = store.fetch(url, 2024, "monaco")
+    assert PdfStore(str(tmp_path), session=requests.Session()).fetch(url, 2024, "monaco") == first
+    assert server.requests == {"GET": 1, "HEAD": 1}
+    assert server.bytes_sent == len(PDF)
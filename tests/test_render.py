@@ -0,0 +1,14 @@
+from render import NEUTRAL_COLORS, car_colors
+from seasons import team_colors
+
+
+def test_known_teams_get_their_team_colors():
+    colors = team_colors(2024)
+    team = next(iter(colors))
+    assert car_colors(2024, [1, 11], {1: team, 11: "Unknown"}) == {1: colors[team], 11: "gray"}
+
+
+def test_unknown_teams_get_distinct_neutral_colors():
+    colors = car_colors(2024, [44, 1, 16, 63])
+    assert len(set(colors.values())) == 4
+    assert set(colors.values()) <= set(NEUTRAL_COLORS)
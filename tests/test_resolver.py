@@ -0,0 +1,22 @@
+import requests
+
+from resolver import VARIANTS, UrlResolver, event_page_url
+
+
+def test_failing_learned_url_falls_back_to_the_variants(tmp_path):
+    resolver = UrlResolver(str(tmp_path / "variants.json"))
+    resolver._remember(2024, "Monaco Grand Prix", "hyphen", VARIANTS[0])
+    learned = event_page_url(2024, "Monaco-Grand-Prix", VARIANTS[0])
+    moved = event_page_url(2024, "Monaco-Grand-Prix", VARIANTS[1])
+    probed = []
+
+    def probe(url):
+        probed.append(url)
+        if url == learned:
+            raise requests.ConnectionError("connection reset")
+        return "lap-chart.pdf" if url == moved else None
+
+    assert resolver.resolve(2024, "Monaco Grand Prix", probe) == (moved, "lap-chart.pdf")
+    assert probed[0] == learned
+    # The variant that worked is remembered instead
+    assert UrlResolver(resolver.cache_path).cache["2024/Monaco Grand Prix"]["variant"] == VARIANTS[1]
@@ -0,0 +1,124 @@
+import pytest
+
+from scheduler import (
+    DAY,
+    QuotaExhausted,
+    QuotaScheduler,
+    TransientError,
+    backoff_delay,
+    retry,
+)
+
+
+class FakeClock:
+    """Clock and sleep that only move when told to, recording every sleep."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def failing(*errors, result="ok"):
+    """A function raising `errors` one call at a time, then returning `result`."""
+    errors = list(errors)
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return func, calls
+
+
+def scheduler(clock, **kwargs):
+    return QuotaScheduler(clock=clock, sleep=clock.sleep, rand=lambda: 0.5, **kwargs)
+
+
+def test_backoff_doubles_up_to_the_limit():
+    delays = [backoff_delay(attempt, 2, 10, rand=lambda: 0.5) for attempt in range(5)]
+    assert delays == [2, 4, 8, 10, 10]
+
+
+def test_retry_backs_off_on_transient_errors():
+    clock = FakeClock()
+    func, calls = failing(TransientError("503", 503), TransientError("503", 503))
+    assert retry(func, base_delay=1, sleep=clock.sleep, rand=lambda: 0.5) == "ok"
+    assert len(calls) == 3
+    assert clock.sleeps == [1, 2]
+
+
+def test_retry_does_not_retry_other_errors():
+    func, calls = failing(ValueError("bad table"))
+    with pytest.raises(ValueError):
+        retry(func, sleep=FakeClock().sleep)
+    assert len(calls) == 1
+
+
+def test_retry_gives_up_after_the_last_attempt():
+    func, calls = failing(*[TransientError("timeout")] * 3)
+    with pytest.raises(TransientError):
+        retry(func, attempts=3, sleep=FakeClock().sleep, rand=lambda: 0.5)
+    assert len(calls) == 3
+
+
+def test_scheduler_waits_only_when_the_minute_is_used_up():
+    clock = FakeClock()
+    quota = scheduler(clock, rpm=2, rpd=100)
+    for _ in range(2):
+        quota.call(lambda: None)
+    assert clock.sleeps == []
+    quota.call(lambda: None)
+    assert sum(clock.sleeps) == pytest.approx(30)
+
+
+def test_scheduler_retries_count_against_the_quota():
+    clock = FakeClock()
+    quota = scheduler(clock, rpm=100, rpd=100, base_delay=5)
+    func, calls = failing(TransientError("429", 429))
+    assert quota.call(func) == "ok"
+    assert len(calls) == 2
+    assert quota.used_today == 2
+    assert clock.sleeps == [5]
+
+
+def test_scheduler_trips_when_the_daily_quota_is_used():
+    clock = FakeClock()
+    quota = scheduler(clock, rpm=100, rpd=2)
+    quota.call(lambda: None)
+    quota.call(lambda: None)
+    func, calls = failing()
+    with pytest.raises(QuotaExhausted):
+        quota.call(func)
+    assert calls == []
+    # The breaker stays open, even once the day is over
+    clock.now += DAY
+    with pytest.raises(QuotaExhausted):
+        quota.call(func)
+
+
+def test_scheduler_trips_on_a_daily_quota_error():
+    clock = FakeClock()
+    quota = scheduler(clock, rpm=100, rpd=100)
+    func, calls = failing(TransientError("429 quota exceeded: requests per day", 429))
+    with pytest.raises(QuotaExhausted):
+        quota.call(func)
+    assert len(calls) == 1
+    assert quota.tripped is not None
+
+
+def test_scheduler_starts_a_new_day():
+    clock = FakeClock()
+    quota = scheduler(clock, rpm=100, rpd=1)
+    quota.call(lambda: None)
+    clock.now += DAY
+    quota.call(lambda: None)
+    assert quota.used_today == 1
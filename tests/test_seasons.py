@@ -0,0 +1,79 @@
+import copy
+import json
+
+import pytest
+
+import seasons
+from seasons import SeasonRegistry, check_registry, read_registry_data
+
+SEASON = {
+    "session_formats": {"normal": ["Qualifying", "Race"], "sprint": ["Sprint", "Race"]},
+    "seasons": {
+        "2024": {
+            "events": ["Bahrain Grand Prix", "São Paulo Grand Prix"],
+            "sessions": {"default": "normal", "São Paulo Grand Prix": "sprint"},
+            "teams": {
+                "Ferrari": {"code": "FER", "color": "#e6194b", "aliases": []},
+                "Red Bull Racing": {"code": "RBR", "color": "#ffe119", "aliases": ["Red Bull"]},
+            },
+        }
+    },
+}
+
+
+def test_shipped_registry_is_consistent():
+    assert check_registry(*read_registry_data()) == []
+
+
+def test_registry_lookups():
+    registry = SeasonRegistry(SEASON)
+    assert registry.event_name(2024, 2) == "São Paulo Grand Prix"
+    assert registry.race_id(2024, "são_paulo_grand_prix") == 2
+    assert registry.sessions(2024, "São Paulo Grand Prix") == ("Sprint", "Race")
+    assert registry.sessions(2024, "Bahrain Grand Prix") == ("Qualifying", "Race")
+    assert registry.sessions(1999, "Bahrain Grand Prix") is None
+    assert registry.team(2024, "red-bull") == "Red Bull Racing"
+    assert registry.team_codes(2024)["Red Bull"] == "RBR"
+    with pytest.raises(TypeError):
+        registry.team_colors(2024)["Ferrari"] = "red"
+
+
+def broken(change):
+    data = copy.deepcopy(SEASON)
+    change(data["seasons"]["2024"])
+    return check_registry(data)
+
+
+def test_conflicting_entries_are_reported():
+    assert broken(lambda s: s["events"].append("Bahrain-Grand-Prix")) == [
+        "2024: event 'Bahrain-Grand-Prix' listed twice"
+    ]
+    assert broken(lambda s: s["sessions"].update({"Monaco Grand Prix": "normal"})) == [
+        "2024: sessions given for 'Monaco Grand Prix', which is not on the calendar"
+    ]
+    assert broken(lambda s: s["sessions"].update({"default": "sprint_2021"})) == [
+        "2024: unknown session format 'sprint_2021' for default"
+    ]
+    assert broken(lambda s: s["teams"]["Ferrari"].update(code="RBR")) == [
+        "2024: code RBR used by Ferrari and Red Bull Racing"
+    ]
+    assert broken(lambda s: s["teams"]["Ferrari"]["aliases"].append("Red Bull")) == [
+        "2024: 'Red Bull' names both Ferrari and Red Bull Racing"
+    ]
+
+
+def test_duplicate_keys_in_the_file_are_reported(tmp_path):
+    text = json.dumps(SEASON).replace('"2024": {', '"2024": {"events": [], ', 1)
+    path = tmp_path / "seasons.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError, match="duplicate key 'events'"):
+        SeasonRegistry(*read_registry_data(str(path)))
+
+
+def test_module_helpers_return_copies():
+    events = seasons.get_events(2024)
+    events.append("Extra Grand Prix")
+    assert "Extra Grand Prix" not in seasons.get_events(2024)
+    colors = seasons.team_colors(2024)
+    colors.clear()
+    assert seasons.team_colors(2024)
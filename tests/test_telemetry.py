@@ -0,0 +1,52 @@
+import pytest
+
+import telemetry
+from engines import GeminiEngine
+from offline import FakeApiError, FakeClient
+from scheduler import QuotaScheduler
+
+TABLE = "POS,1,2\nGRID,1,44\nLAP 1,44,1"
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    """A fresh shared Telemetry writing no files."""
+    fresh = telemetry.Telemetry(log_path=None, prometheus_path=None)
+    monkeypatch.setattr(telemetry, "_shared", fresh)
+    return fresh
+
+
+def test_prometheus_keeps_counters_exact(shared):
+    shared.record("pdf_download", 1.25, bytes=12345678)
+    shared.record("pdf_download", 0.5, ok=False, bytes=1, retries=2)
+    lines = shared.prometheus().splitlines()
+    assert 'lapchart_stage_bytes_total{stage="pdf_download"} 12345679' in lines
+    assert 'lapchart_stage_calls_total{stage="pdf_download"} 2' in lines
+    assert 'lapchart_stage_failures_total{stage="pdf_download"} 1' in lines
+    assert 'lapchart_stage_retries_total{stage="pdf_download"} 2' in lines
+    assert 'lapchart_stage_seconds_total{stage="pdf_download"} 1.75' in lines
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_quota_waits_are_not_model_time(tmp_path, shared, stream):
+    client = FakeClient({}, [TABLE], latency=0, upload_latency=0)
+    answer = client.answer
+    calls = []
+
+    def flaky(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise FakeApiError(429, "RESOURCE_EXHAUSTED: per minute")
+        return answer(*args, **kwargs)
+
+    client.answer = flaky
+    # The backoff after the 429 sleeps for 0.2 seconds
+    scheduler = QuotaScheduler(rpm=60, rpd=10, base_delay=0.2, rand=lambda: 0.5)
+    pdf_file = tmp_path / "chart.pdf"
+    pdf_file.write_bytes(b"%PDF-1.4")
+    engine = GeminiEngine(client=client, stream=stream, scheduler=scheduler)
+    assert engine.extract(str(pdf_file)) == TABLE
+
+    assert shared.totals["quota_wait"]["seconds"] >= 0.2
+    assert shared.totals["model_generation"]["seconds"] < 0.1
+    assert shared.totals["model_generation"]["retries"] == 1
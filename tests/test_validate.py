@@ -0,0 +1,58 @@
+import csv
+
+import pytest
+
+from validate import find_suspects, parse_rows, stack_charts, validate_rows
+
+GOOD = [
+    "POS,1,2,3",
+    "GRID,1,44,16",
+    "LAP 1,44,1,16",
+    "LAP 2,44,16,1",
+    "LAP 3,44,16",
+]
+
+
+def rows(lines):
+    return list(csv.reader(lines))
+
+
+def replace(lines, index, line):
+    return lines[:index] + [line] + lines[index + 1 :]
+
+
+def test_clean_chart_has_no_suspects():
+    assert validate_rows(rows(GOOD)) == {}
+
+
+@pytest.mark.parametrize(
+    "line, reason",
+    [
+        ("LAP 2,44,44,1", "duplicate car"),
+        ("LAP 2,44,,1", "gap between cars"),
+        ("LAP 2,44,16,99", "car not on the grid"),
+        ("LAP 2,44,1x,1", "unreadable row"),
+        ("LAP 7,44,16,1", "unexpected label"),
+    ],
+)
+def test_rows_breaking_the_table_are_flagged(line, reason):
+    suspects = validate_rows(rows(replace(GOOD, 3, line)))
+    assert list(suspects) == [2]
+    assert reason in suspects[2]
+
+
+def test_retired_car_coming_back_blames_the_fewer_laps():
+    # Car 1 is missing from LAP 2 only, so that lap is the one blamed
+    lines = GOOD[:3] + ["LAP 2,44,16", "LAP 3,44,16,1", "LAP 4,44,16,1"]
+    assert validate_rows(rows(lines)) == {2: ["car back after retiring"]}
+
+
+def test_charts_are_checked_together():
+    broken = replace(GOOD, 2, "LAP 1,44,44,16")
+    suspects = find_suspects(*stack_charts([parse_rows(rows(GOOD)), parse_rows(rows(broken))]))
+    assert not suspects["duplicate car"][0].any()
+    assert suspects["duplicate car"][1].tolist() == [False, True, False, False]
+    # Padding rows of the shorter chart are never flagged
+    short = parse_rows(rows(GOOD[:3]))
+    suspects = find_suspects(*stack_charts([short, parse_rows(rows(GOOD))]))
+    assert not any(flags[0].any() for flags in suspects.values())
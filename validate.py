@@ -0,0 +1,223 @@
+import csv
+import glob
+import os
+
+import numpy as np
+
+from archive import ARCHIVE_DIR
+
+# Car number stored in cells where no car is listed
+EMPTY = -1
+
+# Lap number of the GRID row
+GRID = 0
+
+# Lap number of rows whose label is neither GRID nor LAP N
+_BAD_LABEL = -2
+
+
+def _lap_label_number(label):
+    label = label.strip()
+    if label == "GRID":
+        return GRID
+    if label.startswith("LAP ") and label[4:].isdigit():
+        return int(label[4:])
+    return _BAD_LABEL
+
+
+def parse_rows(rows):
+    """
+    Load a lap chart given as parsed CSV rows into arrays.
+
+    Args:
+        rows (list): CSV rows including the POS header, each a list of cells
+
+    Returns:
+        tuple: (cars, laps, unreadable) where `cars` is an int16 matrix with
+            one row per GRID / LAP row and one column per position, EMPTY
+            where no car is listed; `laps` holds the lap number of each row
+            (GRID is 0); `unreadable` flags rows with cells that are not car
+            numbers or fall outside the POS columns
+    """
+    rows = [row for row in rows if row]
+    if not rows:
+        return np.full((0, 0), EMPTY, np.int16), np.zeros(0, np.int32), np.zeros(0, bool)
+
+    positions = len(rows[0]) - 1
+    body = rows[1:]
+    cars = np.full((len(body), positions), EMPTY, np.int16)
+    laps = np.array([_lap_label_number(row[0]) for row in body], np.int32)
+    unreadable = np.zeros(len(body), bool)
+    for index, row in enumerate(body):
+        cells = row[1:]
+        if any(cells[positions:]) or not all(cell.isdigit() for cell in cells if cell):
+            unreadable[index] = True
+            continue
+        for position, cell in enumerate(cells[:positions]):
+            if cell:
+                cars[index, position] = int(cell)
+    return cars, laps, unreadable
+
+
+def read_chart(path):
+    """Load a lap chart CSV file into arrays, see parse_rows."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return parse_rows(list(csv.reader(f)))
+
+
+def stack_charts(charts):
+    """
+    Pad several charts from parse_rows to a common shape.
+
+    Returns:
+        tuple: (cars, laps, unreadable, valid) with a leading chart axis;
+            `valid` is False for the padding rows
+    """
+    count = len(charts)
+    rows = max((len(laps) for _, laps, _ in charts), default=0)
+    positions = max((cars.shape[1] for cars, _, _ in charts), default=0)
+    stacked_cars = np.full((count, rows, positions), EMPTY, np.int16)
+    stacked_laps = np.full((count, rows), _BAD_LABEL, np.int32)
+    stacked_unreadable = np.zeros((count, rows), bool)
+    valid = np.zeros((count, rows), bool)
+    for index, (cars, laps, unreadable) in enumerate(charts):
+        stacked_cars[index, : cars.shape[0], : cars.shape[1]] = cars
+        stacked_laps[index, : len(laps)] = laps
+        stacked_unreadable[index, : len(laps)] = unreadable
+        valid[index, : len(laps)] = True
+    return stacked_cars, stacked_laps, stacked_unreadable, valid
+
+
+def find_suspects(cars, laps, unreadable, valid):
+    """
+    Check every lap of every chart at once.
+
+    The first row of each chart has to be the GRID. Every lap row after it
+    must list distinct cars from the grid, packed from P1 without gaps, and
+    be labelled with the next lap number. A car that drops out of the chart
+    must not come back: when it does, either the laps it is missing from or
+    the laps it reappears in are wrong, whichever are fewer get the blame.
+
+    Args:
+        cars (ndarray): Car numbers, shape (charts, rows, positions)
+        laps (ndarray): Lap number of each row, shape (charts, rows)
+        unreadable (ndarray): Rows that could not be parsed
+        valid (ndarray): False for padding rows
+
+    Returns:
+        dict: Reason to a boolean (charts, rows) array of the rows it applies to
+    """
+    charts, rows, _ = cars.shape
+    filled = cars != EMPTY
+    suspects = {"unreadable row": unreadable & valid}
+
+    # Labels: GRID first, then LAP 1, LAP 2, ...
+    expected = np.broadcast_to(np.arange(rows, dtype=np.int32), (charts, rows))
+    suspects["unexpected label"] = valid & (laps != expected)
+
+    # The same car twice in one row
+    ordered = np.sort(cars, axis=2)
+    repeated = (ordered[:, :, 1:] == ordered[:, :, :-1]) & (ordered[:, :, 1:] != EMPTY)
+    suspects["duplicate car"] = valid & repeated.any(axis=2)
+
+    # An empty position followed by a car
+    suspects["gap between cars"] = valid & (~filled[:, :, :-1] & filled[:, :, 1:]).any(axis=2)
+
+    # match[c, r, p, g]: the car in position p of row r is grid slot g
+    grid = cars[:, :1, :]
+    match = (cars[:, :, :, None] == grid[:, :, None, :]) & filled[:, :, :, None]
+    on_grid = match.any(axis=3) | ~filled
+    suspects["car not on the grid"] = valid & ~on_grid.all(axis=2)
+    suspects["car not on the grid"][:, 0] = False
+
+    # present[c, r, g]: grid slot g is listed in lap row r
+    present = match[:, 1:].any(axis=2) & valid[:, 1:, None]
+    lap_index = np.arange(rows - 1)[None, :, None]
+    reversed_first = np.argmax(present[:, ::-1, :], axis=1)
+    last_seen = np.where(present.any(axis=1), rows - 2 - reversed_first, -1)[:, None, :]
+    first_gone = np.where(~present & valid[:, 1:, None], lap_index, rows)
+    first_gone = first_gone.min(axis=1)[:, None, :]
+    missing = ~present & (lap_index < last_seen) & valid[:, 1:, None]
+    returned = present & (lap_index > first_gone)
+    blame_missing = missing.sum(axis=1) <= returned.sum(axis=1)
+    blamed = np.where(blame_missing[:, None, :], missing, returned).any(axis=2)
+    suspects["car back after retiring"] = np.zeros((charts, rows), bool)
+    suspects["car back after retiring"][:, 1:] = blamed
+    return suspects
+
+
+def suspect_laps(suspects, chart=0):
+    """
+    Collect the suspect rows of one chart from find_suspects.
+
+    Returns:
+        dict: Row index (0 is the GRID, n is LAP n) to the list of reasons
+    """
+    report = {}
+    for reason, flags in suspects.items():
+        for row in np.flatnonzero(flags[chart]):
+            report.setdefault(int(row), []).append(reason)
+    return dict(sorted(report.items()))
+
+
+def validate_rows(rows):
+    """
+    Report the suspect laps of a lap chart given as parsed CSV rows.
+
+    Returns:
+        dict: Row index (0 is the GRID, n is LAP n) to the list of reasons
+    """
+    return suspect_laps(find_suspects(*stack_charts([parse_rows(rows)])))
+
+
+def validate_csv_text(csv_content):
+    """Report the suspect laps of a lap chart given as CSV text, see validate_rows."""
+    return validate_rows(list(csv.reader(csv_content.splitlines())))
+
+
+def validate_archive(archive_dir=ARCHIVE_DIR):
+    """
+    Check every lap chart CSV of the archive in one batch.
+
+    Args:
+        archive_dir (str): Directory holding the lap chart CSVs
+
+    Returns:
+        dict: CSV path to its suspect laps (see validate_rows), only for
+            files with suspects
+    """
+    paths = sorted(glob.glob(os.path.join(archive_dir, "[0-9][0-9][0-9][0-9]_*.csv")))
+    charts = []
+    for path in paths:
+        try:
+            charts.append(read_chart(path))
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            print(f"Could not read {path}: {e}")
+            charts.append(parse_rows([]))
+    suspects = find_suspects(*stack_charts(charts))
+    report = {}
+    for index, path in enumerate(paths):
+        laps = suspect_laps(suspects, index)
+        if laps:
+            report[path] = laps
+    return report
+
+
+def format_laps(laps):
+    """Describe suspect laps from validate_rows, one per line."""
+    return [
+        f"{'GRID' if row == GRID else f'LAP {row}'}: {', '.join(reasons)}"
+        for row, reasons in laps.items()
+    ]
+
+
+def print_archive_report(report):
+    """Print a report built by validate_archive."""
+    if not report:
+        print("No suspect laps in the archive.")
+        return
+    print(f"{len(report)} lap charts with suspect laps:")
+    for path, laps in report.items():
+        print(f"  {os.path.basename(path)}")
+        for line in format_laps(laps):
+            print(f"    {line}")